@@ -1,49 +1,122 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import School, Department, Teacher, Rating, UserVote, UserInteraction, User
+from django.db import transaction
+from . import keywords, scores, versions
+from .models import School, Department, Teacher, Rating, UserVote, UserInteraction, User, TeacherScore, AuthToken
+
+
+class DataVersionAdminMixin:
+    """后台修改数据提交后递增所有数据版本，使读接口的 ETag 失效（见 api/versions.py）"""
+
+    def save_related(self, request, form, formsets, change):
+        # save_related 在 save_model 之后执行，此时各 ModelAdmin 的附带更新都已完成
+        super().save_related(request, form, formsets, change)
+        transaction.on_commit(versions.bump_all)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(versions.bump_all)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(versions.bump_all)
+
+
+def remove_ratings(ratings):
+    """删除评分前把其中的有效评分移出 TeacherScore，并刷新相关老师的关键词"""
+    for teacher_id in scores.remove_ratings(ratings):
+        keywords.schedule_refresh(teacher_id)
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(DataVersionAdminMixin, BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Info', {'fields': ('school',)}),
     )
 
+    # 删除用户会级联删除其评分，先把这些评分移出汇总表
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            remove_ratings(Rating.objects.filter(user=obj))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            remove_ratings(Rating.objects.filter(user__in=queryset))
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(School)
-class SchoolAdmin(admin.ModelAdmin):
+class SchoolAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('school_code', 'school_name')
     search_fields = ('school_code', 'school_name')
 
 
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
+class DepartmentAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('department_id', 'department_name')
     search_fields = ('department_name',)
 
 
 @admin.register(Teacher)
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('teacher_id', 'name', 'department')
     search_fields = ('name',)
     list_filter = ('department',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # 老师换了学校时，同步其评分上冗余的学校字段
+        Rating.objects.filter(teacher=obj).exclude(school_id=obj.school_id).update(school_id=obj.school_id)
+
 
 @admin.register(Rating)
-class RatingAdmin(admin.ModelAdmin):
+class RatingAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('rating_id', 'teacher', 'user', 'tier', 'created_at')
     list_filter = ('tier', 'teacher')
     search_fields = ('reason',)
 
+    def save_model(self, request, obj, form, change):
+        previous = Rating.objects.filter(pk=obj.pk).first() if change else None
+        obj.school_id = obj.teacher.school_id
+        super().save_model(request, obj, form, change)
+        scores.apply_rating_change(previous, obj)
+        if scores.is_valid(obj.likes, obj.dislikes):
+            for teacher_id in {obj.teacher_id} | ({previous.teacher_id} if previous else set()):
+                keywords.schedule_refresh(teacher_id)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            remove_ratings(Rating.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            remove_ratings(queryset)
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(UserVote)
-class UserVoteAdmin(admin.ModelAdmin):
+class UserVoteAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('vote_id', 'user', 'vote_date', 'teacher')
     list_filter = ('vote_date',)
 
 
 @admin.register(UserInteraction)
-class UserInteractionAdmin(admin.ModelAdmin):
+class UserInteractionAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ('interaction_id', 'user', 'rating', 'interaction_type', 'created_at')
     list_filter = ('interaction_type',)
 
+
+
+@admin.register(TeacherScore)
+class TeacherScoreAdmin(DataVersionAdminMixin, admin.ModelAdmin):
+    list_display = ('teacher', 'period', 'period_start', 't1', 't2', 't3', 'count', 'total_score')
+    list_filter = ('period',)
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'device', 'created_at', 'expires_at')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
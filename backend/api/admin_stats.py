@@ -0,0 +1,109 @@
+"""
+超级管理员统计面板（/api/superadmin/stats/）的聚合查询与缓存。
+
+- 每张表一条条件聚合查询（Count(..., filter=Q(...))），共 5 条，替代原来的 11 条 COUNT
+- 结果缓存 SUPERADMIN_STATS_CACHE_TTL 秒（默认 30 秒），缓存键包含本地日期，跨天自动失效
+- 每个统计项单独存一个缓存键，高频写路径（评分、点赞/点踩）调用 adjust_stats 用 cache.incr
+  原子增减对应的计数；低频写路径（注册、审批、删除、老师/学校增删、批量导入等）调用 invalidate_stats 直接失效
+- 缓存使用 Django cache（默认进程内 LocMemCache），多进程部署时各进程分别缓存，
+  由 TTL 保证最终一致
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import School, Teacher, Rating, UserInteraction
+
+
+CACHE_KEY_PREFIX = 'superadmin:stats'
+
+
+def _cache_key():
+    return f'{CACHE_KEY_PREFIX}:{timezone.localdate().isoformat()}'
+
+
+def _field_keys(prefix, fields):
+    return {field: f'{prefix}:{field}' for field in fields}
+
+
+def _ttl():
+    return getattr(settings, 'SUPERADMIN_STATS_CACHE_TTL', 30)
+
+
+def compute_stats():
+    """直接查询数据库计算统计信息"""
+    User = get_user_model()
+    today = timezone.localdate()
+
+    users = User.objects.aggregate(
+        users=Count('pk'),
+        admins=Count('pk', filter=Q(is_staff=True)),
+        pending_users=Count('pk', filter=Q(approval_status=User.APPROVAL_PENDING)),
+        approved_users=Count('pk', filter=Q(approval_status=User.APPROVAL_APPROVED)),
+        rejected_users=Count('pk', filter=Q(approval_status=User.APPROVAL_REJECTED)),
+    )
+    ratings = Rating.objects.aggregate(
+        ratings=Count('pk'),
+        ratings_today=Count('pk', filter=Q(created_at__date=today)),
+    )
+    interactions = UserInteraction.objects.aggregate(
+        total_likes=Count('pk', filter=Q(interaction_type=UserInteraction.LIKE)),
+        total_dislikes=Count('pk', filter=Q(interaction_type=UserInteraction.DISLIKE)),
+    )
+
+    return {
+        'schools': School.objects.count(),
+        'teachers': Teacher.objects.count(),
+        'users': users['users'],
+        'admins': users['admins'],
+        'ratings': ratings['ratings'],
+        'ratings_today': ratings['ratings_today'],
+        'pending_users': users['pending_users'],
+        'approved_users': users['approved_users'],
+        'rejected_users': users['rejected_users'],
+        'total_likes': interactions['total_likes'],
+        'total_dislikes': interactions['total_dislikes'],
+    }
+
+
+FIELDS = (
+    'schools', 'teachers', 'users', 'admins', 'ratings', 'ratings_today',
+    'pending_users', 'approved_users', 'rejected_users', 'total_likes', 'total_dislikes',
+)
+
+
+def get_stats(fresh=False):
+    """读取统计信息；fresh=True 时跳过缓存重新计算"""
+    keys = _field_keys(_cache_key(), FIELDS)
+    if not fresh:
+        cached = cache.get_many(list(keys.values()))
+        # 任一统计项缺失（过期或被失效）都整体重新计算
+        if len(cached) == len(keys):
+            return {field: cached[key] for field, key in keys.items()}
+    stats = compute_stats()
+    cache.set_many({keys[field]: stats[field] for field in FIELDS}, _ttl())
+    return stats
+
+
+def adjust_stats(**deltas):
+    """
+    在缓存的统计信息上原子地增减计数，例如 adjust_stats(ratings=1, ratings_today=1)。
+
+    每项使用 cache.incr，多个进程同时调整不会互相覆盖；缓存不存在时不做任何事（下次读取时重新计算）。
+    """
+    for field, key in _field_keys(_cache_key(), deltas).items():
+        if not deltas[field]:
+            continue
+        try:
+            value = cache.incr(key, deltas[field])
+        except ValueError:
+            # 该项已过期，剩余各项在下次读取时随之整体重新计算
+            continue
+        if value < 0:
+            cache.delete(key)
+
+
+def invalidate_stats():
+    cache.delete_many(list(_field_keys(_cache_key(), FIELDS).values()))
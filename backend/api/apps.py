@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
+
+    def ready(self):
+        from . import vote_buffer
+        vote_buffer.check_cache()
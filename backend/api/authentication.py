@@ -0,0 +1,172 @@
+"""
+带过期时间、共享缓存的 Token 认证。
+
+令牌存放在 AuthToken 表（api/models.py）：每次登录签发新令牌（每台设备一个），
+有效期 AUTH_TOKEN_LIFETIME 秒；使用中的令牌剩余时间不足一半时顺延（滑动过期），
+续期最多每半个有效期写一次数据库。过期令牌由 purge_expired_tokens 命令分批删除。
+
+认证时先查 Django cache 的 AUTH_TOKEN_CACHE 别名中的 token -> 令牌快照（含用户）
+（容量 AUTH_TOKEN_CACHE_SIZE，有效期 AUTH_TOKEN_CACHE_TTL 秒），
+命中时不查询数据库，令牌是否过期也直接用缓存中的过期时间判断。
+
+以下操作会主动失效缓存（invalidate_user / clear_token_cache）：
+修改/重置密码、禁用或删除用户、审批状态和评分权限变更、删除学校或修改学校代码。
+配置了 SHARED_CACHE_URL 时缓存在所有工作进程间共享，失效立即对所有进程生效；
+否则是进程内缓存，其他进程最多在 AUTH_TOKEN_CACHE_TTL 秒后过期，因此 TTL 不宜设置过长。
+"""
+import binascii
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken
+
+
+class TokenCache:
+    """
+    key -> 令牌快照的缓存，存放在 Django cache 中。
+
+    clear() 递增代数（generation）而不是清空整个缓存：每条缓存记录写入时的代数，
+    读取时与当前代数一起取出（一次 get_many），代数不同即视为未命中。
+    """
+    GENERATION_KEY = 'generation'
+
+    def __init__(self, alias, ttl, enabled=True):
+        self.alias = alias
+        self.ttl = ttl
+        self.enabled = enabled and ttl > 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        return f'token:{key}'
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        entries = self.cache.get_many([self._key(key), self.GENERATION_KEY])
+        entry = entries.get(self._key(key))
+        if entry is None:
+            return None
+        value, generation = entry
+        if generation != entries.get(self.GENERATION_KEY, 0):
+            return None
+        return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        self.cache.set(self._key(key), (value, self.cache.get(self.GENERATION_KEY, 0)), self.ttl)
+
+    def delete_many(self, keys):
+        if self.enabled and keys:
+            self.cache.delete_many([self._key(key) for key in keys])
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def invalidate_user(self, user_id):
+        """
+        删除该用户全部令牌的缓存。
+
+        在事务提交后删除：删除用户时令牌随之级联删除，提交前的请求仍可能把令牌重新写入缓存。
+        """
+        if not self.enabled:
+            return
+        keys = list(AuthToken.objects.filter(user_id=user_id).values_list('key', flat=True))
+        transaction.on_commit(lambda: self.delete_many(keys))
+
+    def clear(self):
+        if not self.enabled:
+            return
+        self.cache.add(self.GENERATION_KEY, 0, timeout=None)
+        self.cache.incr(self.GENERATION_KEY)
+
+
+token_cache = TokenCache(
+    getattr(settings, 'AUTH_TOKEN_CACHE', 'tokens'),
+    ttl=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60),
+    enabled=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000) > 0,
+)
+
+
+def invalidate_user(user_id):
+    """用户密码、状态或权限变化后调用，使该用户的所有已缓存 Token 失效；删除用户时须在删除之前调用"""
+    token_cache.invalidate_user(user_id)
+
+
+def clear_token_cache():
+    """批量修改用户（如学校代码变更）后调用，使全部缓存失效"""
+    token_cache.clear()
+
+
+def token_lifetime():
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 7 * 24 * 3600))
+
+
+def issue_token(user, request=None):
+    """
+    登录成功后签发新令牌并返回 key。
+
+    同一用户最多保留 AUTH_TOKEN_MAX_PER_USER 个未过期令牌，超出时删除最早签发的。
+    """
+    device = ''
+    if request is not None:
+        device = (request.META.get('HTTP_X_DEVICE_NAME') or request.META.get('HTTP_USER_AGENT') or '')[:128]
+    token = AuthToken.objects.create(
+        key=binascii.hexlify(os.urandom(20)).decode(),
+        user=user,
+        device=device,
+        expires_at=timezone.now() + token_lifetime(),
+    )
+
+    max_tokens = getattr(settings, 'AUTH_TOKEN_MAX_PER_USER', 10)
+    stale = list(
+        AuthToken.objects.filter(user=user).order_by('-created_at').values_list('key', flat=True)[max_tokens:]
+    )
+    if stale:
+        AuthToken.objects.filter(key__in=stale).delete()
+        token_cache.delete_many(stale)
+    return token.key
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    与 TokenAuthentication 相同的请求头格式（Authorization: Token <key>），
+    认证结果缓存在 AUTH_TOKEN_CACHE 中；每次从缓存读取的都是反序列化出的新对象，请求之间互不影响。
+    快照不包含关联的学校，user.school 仍在使用时读取，学校额度等设置的修改即时生效。
+    """
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        now = timezone.now()
+        token = token_cache.get(key)
+        if token is None or token.expires_at <= now:
+            try:
+                token = AuthToken.objects.select_related('user').get(key=key)
+            except AuthToken.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if token.expires_at <= now:
+                token_cache.delete(key)
+                raise exceptions.AuthenticationFailed('登录已过期，请重新登录')
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            token_cache.set(key, token)
+
+        # 滑动过期：剩余时间不足一半时顺延，避免每个请求都写数据库
+        lifetime = token_lifetime()
+        if token.expires_at - now < lifetime / 2:
+            token.expires_at = now + lifetime
+            AuthToken.objects.filter(key=key).update(expires_at=token.expires_at)
+            token_cache.set(key, token)
+
+        return token.user, key
@@ -0,0 +1,60 @@
+"""
+用户名或邮箱登录的认证后端。
+
+一条 WHERE username = %s OR email = %s 查询（两列均有索引）同时按用户名和邮箱查找用户，
+用户名匹配优先；找到后直接在该对象上校验密码，后续的审批/激活检查也使用同一个对象，
+不再像 authenticate() 默认的 ModelBackend 那样按用户名重新查询一次。
+
+登录接口使用 authenticate_login()：密码校验在进程池中执行并限制排队数量（api/passwords.py），
+繁忙时抛出 passwords.HashingBusy。Django admin 等其他调用 authenticate() 的地方仍在当前线程中校验。
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from . import passwords
+
+
+UserModel = get_user_model()
+
+
+def find_user(identifier):
+    """按用户名或邮箱查找用户（一条查询），两者都匹配不同用户时以用户名为准，找不到返回 None"""
+    if not identifier:
+        return None
+    candidates = list(
+        UserModel.objects.filter(Q(username=identifier) | Q(email=identifier)).order_by('pk')[:2]
+    )
+    for user in candidates:
+        if user.username == identifier:
+            return user
+    return candidates[0] if candidates else None
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """authenticate(username=...) 同时接受用户名或邮箱，权限相关方法沿用 ModelBackend"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD) or kwargs.get('email')
+        if username is None or password is None:
+            return None
+        user = find_user(username)
+        if user is None:
+            # 与 ModelBackend 相同：用户不存在时也计算一次哈希，避免通过响应时间判断用户是否存在
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+def authenticate_login(user, password):
+    """
+    登录接口校验已查到的用户（可为 None）的密码，成功且账户未停用时返回该用户，否则返回 None。
+
+    密码校验在进程池中执行，需要时顺便升级密码哈希；繁忙时抛出 passwords.HashingBusy。
+    """
+    if not passwords.check_password(user, password):
+        return None
+    return user if getattr(user, 'is_active', True) else None
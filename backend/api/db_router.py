@@ -0,0 +1,84 @@
+"""
+只读副本路由（配置 DATABASE_REPLICA_URLS 后启用，见 settings.py）。
+
+- 写操作始终使用主库 default
+- 使用 ReplicaReadMixin 的视图集（评分、老师、学校、超级管理员列表）处理 GET 请求时，
+  读查询随机分配到一个副本；认证、权限检查仍在主库上完成
+- 读己之写：用户在这些视图集上成功执行写请求（评分、点赞/点踩等）后的 REPLICA_STICKY_SECONDS 秒内，
+  该用户的读请求仍走主库，避免副本复制延迟导致刚提交的内容“消失”。
+  标记同时记录在 Django 缓存（按用户）和响应 Cookie 中：使用进程内缓存的多进程部署下，
+  前端请求携带 Cookie 时同样生效
+
+本地测试可以把 db.sqlite3 复制一份作为副本：DATABASE_REPLICA_URLS=sqlite:////绝对路径/replica.sqlite3
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+
+PIN_COOKIE = 'db_primary_pin'
+PIN_CACHE_PREFIX = 'db:pin'
+
+# 当前请求的读查询使用的副本别名（None 表示主库）
+_read_replica = contextvars.ContextVar('read_replica', default=None)
+
+
+def replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库数据相同，跨库的对象关系视为同一个库
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 副本通过数据库复制（或复制 SQLite 文件）同步结构，不单独执行迁移
+        return db == 'default'
+
+
+def pin_to_primary(request, response):
+    """写请求成功后，让该用户接下来几秒的读请求走主库"""
+    seconds = sticky_seconds()
+    if request.user and request.user.is_authenticated:
+        cache.set(f'{PIN_CACHE_PREFIX}:{request.user.pk}', 1, seconds)
+    response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+
+
+def is_pinned(request):
+    if request.COOKIES.get(PIN_COOKIE):
+        return True
+    user = request.user
+    return bool(user and user.is_authenticated and cache.get(f'{PIN_CACHE_PREFIX}:{user.pk}'))
+
+
+class ReplicaReadMixin:
+    """视图集混入：GET 请求读副本，写请求成功后把用户固定到主库几秒"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        names = replicas()
+        if names and request.method in permissions.SAFE_METHODS and not is_pinned(request):
+            self._replica_token = _read_replica.set(random.choice(names))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_replica.reset(token)
+            self._replica_token = None
+        elif replicas() and request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,110 @@
+"""
+热点列表接口（评分、老师列表）的快速序列化。
+
+ModelSerializer 逐行逐字段调用 Field.get_attribute / to_representation，
+masked_user_id 的 SerializerMethodField、teacher.name 的关联属性访问在长列表上占用大量 CPU。
+快速路径直接查询 .values()（关联字段用注解取出，不实例化模型对象），再按固定字段顺序拼出 dict：
+
+- 输出与对应的 ModelSerializer 完全相同（字段顺序、日期时间格式、空值时省略的字段），渲染出的 JSON 逐字节一致
+- 日期时间复用 DRF 的 DateTimeField.to_representation，保证时区和格式与 REST_FRAMEWORK 配置一致
+- 视图集通过 values_serializer_class 选择是否启用；FAST_LIST_SERIALIZERS=false 时全部回退到 ModelSerializer
+- 只用于 list；详情、创建、更新等仍走原来的序列化器
+"""
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from . import vote_buffer
+from .serializers import RatingSerializer, TeacherSerializer
+
+
+_datetime = serializers.DateTimeField()
+
+
+class ValuesSerializer(ABC):
+    """
+    子类指定 columns（.values() 查询的列）、annotations（关联字段注解）并实现 to_representation(row)，
+    输出字段须与 serializer_class 一致。
+    """
+    serializer_class = None
+    columns = ()
+    annotations = {}
+
+    def values(self, queryset):
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values(*self.columns, *self.annotations)
+
+    @abstractmethod
+    def to_representation(self, row):
+        """把 .values() 查询出的一行转换成与 serializer_class 输出相同的 dict"""
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class RatingValuesSerializer(ValuesSerializer):
+    serializer_class = RatingSerializer
+    columns = (
+        'rating_id', 'teacher_id', 'user_id', 'tier', 'reason',
+        'likes', 'dislikes', 'is_featured', 'created_at', 'updated_at',
+    )
+    annotations = {'teacher_name': F('teacher__name')}
+
+    def to_representation(self, row):
+        return {
+            'rating_id': row['rating_id'],
+            'teacher': row['teacher_id'],
+            'teacher_name': row['teacher_name'],
+            'masked_user_id': f"anon-{row['user_id']}",
+            'tier': row['tier'],
+            'reason': row['reason'],
+            'likes': row['likes'],
+            'dislikes': row['dislikes'],
+            'is_featured': row['is_featured'],
+            'created_at': _datetime.to_representation(row['created_at']),
+            'updated_at': _datetime.to_representation(row['updated_at']),
+        }
+
+    def serialize(self, rows):
+        # 与 RatingSerializer 相同，叠加点赞缓冲中尚未写回的增量（整页一次读取缓冲）
+        return vote_buffer.merge_pending(super().serialize(rows))
+
+
+class TeacherValuesSerializer(ValuesSerializer):
+    serializer_class = TeacherSerializer
+    columns = ('teacher_id', 'name', 'department_id', 'school_id', 'created_at')
+    annotations = {'department_name': F('department__department_name')}
+
+    def to_representation(self, row):
+        data = {
+            'teacher_id': row['teacher_id'],
+            'name': row['name'],
+            'department': row['department_id'],
+            'department_name': row['department_name'],
+            'school': row['school_id'],
+        }
+        # school_code 即学校主键；与 TeacherSerializer 一致，老师没有学校时不输出该字段
+        if row['school_id'] is not None:
+            data['school_code'] = row['school_id']
+        data['created_at'] = _datetime.to_representation(row['created_at'])
+        return data
+
+
+class ValuesListMixin:
+    """视图集混入：values_serializer_class 不为空时，list 使用快速序列化"""
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None or not getattr(settings, 'FAST_LIST_SERIALIZERS', True):
+            return super().list(request, *args, **kwargs)
+
+        fast = self.values_serializer_class()
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(queryset))
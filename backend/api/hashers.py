@@ -0,0 +1,30 @@
+"""
+可通过设置调整参数的密码哈希器。
+
+算法名称与 Django 自带的哈希器相同，已有的密码哈希可以直接校验；
+调整参数（或通过 PASSWORD_HASHER 切换首选算法）后，用户下次登录成功时
+会按新参数重新哈希（见 api/passwords.py）。
+参数可用 `python manage.py benchmark_password_hashers --target-ms 100` 按目标耗时测算，
+设置为 0 或未设置时使用 Django 的默认值。
+
+- PBKDF2：PASSWORD_PBKDF2_ITERATIONS（迭代次数）
+- scrypt：PASSWORD_SCRYPT_WORK_FACTOR（N，2 的幂）
+- Argon2：PASSWORD_ARGON2_TIME_COST、PASSWORD_ARGON2_MEMORY_COST（KiB），需要安装 argon2-cffi
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', 0) or hashers.PBKDF2PasswordHasher.iterations
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = getattr(settings, 'PASSWORD_ARGON2_TIME_COST', 0) or hashers.Argon2PasswordHasher.time_cost
+    memory_cost = getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', 0) or hashers.Argon2PasswordHasher.memory_cost
+
+
+if hasattr(hashers, 'ScryptPasswordHasher'):
+    # Django 4.0 起才内置 scrypt
+    class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+        work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', 0) or hashers.ScryptPasswordHasher.work_factor
@@ -0,0 +1,281 @@
+"""
+老师评论关键词提取（服务端版本）
+
+与前端 src/utils/ranking.js 的 extractKeywords 保持一致：
+- 清理为纯中文后，用 2-4 字滑动窗口（以及含教学常见词的 5 字短语）提取候选词
+- 相同的停用词表；T1/T2/T3 权重 1/2/3；踩多于赞的评分不参与
+- 分数 = TF × IDF × 加权分，再按“长词包含短词”规则去重，取前 KEYWORD_LIMIT 个
+- 唯一差异：分数、评论数、长度都相同时，前端用 localeCompare('zh-CN')（拼音序），
+  这里按 Unicode 码点排序
+
+结果按老师持久化在 TeacherKeywords 表中，/api/teachers/{id}/keywords/ 直接读取该表。
+重算需要重新切分该老师的全部评论，不在请求中执行：
+
+- 评分创建、删除或有效性变化时，事务提交后只把该老师标记为待重算（一条 UPDATE 写 dirty_at）
+- 后台线程每 KEYWORDS_REFRESH_INTERVAL_MS 毫秒重算一批待重算的老师，同一老师在间隔内的多次写入合并为一次；
+  也可以通过 `python manage.py refresh_keywords` 手动（或定时）重算
+- 重算前用条件 UPDATE 认领（清除 dirty_at 并记录 claimed_at），多个进程不会重复计算同一位老师；
+  结果只在认领未被更新的认领覆盖时写回，避免较慢的旧结果覆盖新结果
+- 读取时还没有计算过的老师先返回空列表并标记待重算
+"""
+import logging
+import math
+import re
+import threading
+import time
+from functools import cmp_to_key
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Rating, Teacher, TeacherKeywords
+
+
+logger = logging.getLogger(__name__)
+
+
+KEYWORD_LIMIT = 5
+
+# 停用词：无意义的词和短语
+STOP_WORDS = frozenset([
+    # 代词和指示词
+    '这个', '那个', '这些', '那些', '这样', '那样', '什么', '怎么', '如何', '为什么',
+    # 程度副词
+    '非常', '比较', '很', '特别', '相当', '十分', '极其', '有点', '稍微',
+    '一般', '基本', '大概', '大约', '差不多', '几乎', '完全', '全部', '所有',
+    # 连接词
+    '但是', '不过', '然而', '而且', '并且', '或者', '如果', '因为', '所以',
+    '虽然', '尽管', '即使', '无论', '不管', '只要', '只有', '除了',
+    # 语气词和助词
+    '就是', '也是', '都是', '还是', '其实', '确实', '真的', '应该',
+    '可能', '也许', '或许', '似乎', '好像', '仿佛', '感觉',
+    # 否定词
+    '不是', '没有', '不会', '不能', '不行', '不可以', '不应该', '不太',
+    # 时间词
+    '现在', '以前', '以后', '之前', '之后', '今天', '昨天', '明天', '上课', '下课',
+    # 通用无意义词
+    '老师', '教授', '可以', '能够', '需要', '必须', '一定',
+    '很多', '一些', '一点', '几个', '有时', '偶尔', '经常', '总是', '一直',
+    # 单字停用词
+    '的', '了', '在', '是', '我', '你', '他', '她', '它', '们',
+    '有', '和', '就', '不', '人', '都', '一', '个', '上', '也',
+    '到', '说', '要', '去', '会', '着', '看', '好', '自己', '这', '那',
+])
+
+# 教学相关常见词：5 字短语只在包含这些词时提取
+COMMON_TEACHING_WORDS = (
+    '作业', '考试', '课程', '课堂', '教学', '讲课', '讲解', '内容', '知识',
+    '学生', '班级', '学期', '成绩', '分数', '评分', '评价',
+)
+
+# 评分权重：T3 权重最高，T2 次之，T1 最低
+TIER_WEIGHTS = {'T1': 1, 'T2': 2, 'T3': 3}
+
+NON_CHINESE = re.compile(r'[^\u4e00-\u9fa5]')
+
+
+def _has_stop_boundary(word):
+    """词的首/尾两个字是停用词"""
+    for j in range(len(word) - 1):
+        if word[j:j + 2] in STOP_WORDS and (j == 0 or j == len(word) - 2):
+            return True
+    return False
+
+
+def _compare(a, b):
+    if abs(b['score'] - a['score']) > 0.1:
+        return -1 if b['score'] < a['score'] else 1
+    # 分数相近时，优先选择出现在更多评论中的词
+    if b['docs'] != a['docs']:
+        return b['docs'] - a['docs']
+    # 再按长度（优先长词）
+    if len(b['word']) != len(a['word']):
+        return len(b['word']) - len(a['word'])
+    return (a['word'] > b['word']) - (a['word'] < b['word'])
+
+
+def _is_inner(short, long):
+    """short 出现在 long 的中间（不在边界）"""
+    index = long.find(short)
+    return 0 < index < len(long) - len(short)
+
+
+def extract_keywords(ratings, limit=KEYWORD_LIMIT):
+    """
+    从评分中提取关键词。
+
+    ratings 为 (reason, tier, likes, dislikes) 序列，返回关键词列表（最多 limit 个）。
+    """
+    docs = []
+    for reason, tier, likes, dislikes in ratings:
+        text = (reason or '').strip()
+        if (dislikes or 0) > (likes or 0) or len(text) < 2:
+            continue
+        docs.append((text, TIER_WEIGHTS.get(tier, 1)))
+    if not docs:
+        return []
+
+    # {word: {'count': 出现次数, 'score': 加权分数, 'docs': 出现在多少条评论中}}
+    word_stats = {}
+    for text, weight in docs:
+        clean = NON_CHINESE.sub('', text)
+        if len(clean) < 2:
+            continue
+
+        extracted = set()
+
+        def record(word):
+            extracted.add(word)
+            stats = word_stats.setdefault(word, {'count': 0, 'score': 0, 'docs': 0})
+            stats['count'] += 1
+            stats['score'] += weight
+            stats['docs'] += 1
+
+        # 2-4 字短语（滑动窗口）
+        for length in range(2, 5):
+            for i in range(len(clean) - length + 1):
+                word = clean[i:i + length]
+                if word in STOP_WORDS or _has_stop_boundary(word) or word in extracted:
+                    continue
+                record(word)
+
+        # 5 字短语：只保留包含教学常见词的
+        for i in range(len(clean) - 4):
+            word = clean[i:i + 5]
+            if (any(w in word for w in COMMON_TEACHING_WORDS)
+                    and word not in STOP_WORDS and word not in extracted):
+                record(word)
+
+    total_docs = len(docs)
+    candidates = []
+    for word, stats in word_stats.items():
+        tf = stats['count'] / total_docs
+        idf = math.log(total_docs / (stats['docs'] + 1))
+        score = tf * idf * stats['score']
+        # 至少出现在 2 条评论中，或出现在 1 条但权重很高
+        if stats['docs'] >= 2 or (stats['docs'] == 1 and score >= 5):
+            candidates.append({'word': word, 'score': score, 'docs': stats['docs']})
+    candidates.sort(key=cmp_to_key(_compare))
+
+    # 去重：长词包含短词时，按分数决定保留哪个
+    final = []
+    for candidate in candidates:
+        should_add = True
+        for existing in final:
+            if (candidate['word'] != existing['word'] and _is_inner(candidate['word'], existing['word'])
+                    and candidate['score'] < existing['score'] * 0.8):
+                should_add = False
+                break
+
+        if should_add:
+            final.append(candidate)
+            for i in range(len(final) - 2, -1, -1):
+                existing = final[i]
+                if (existing['word'] != candidate['word'] and _is_inner(existing['word'], candidate['word'])
+                        and candidate['score'] >= existing['score'] * 0.8):
+                    del final[i]
+
+        if len(final) >= limit:
+            break
+
+    return [item['word'] for item in final[:limit]]
+
+
+def compute_teacher_keywords(teacher_id):
+    """根据一位老师的全部评分计算关键词（不保存）"""
+    ratings = Rating.objects.filter(teacher_id=teacher_id).values_list('reason', 'tier', 'likes', 'dislikes')
+    return extract_keywords(ratings.iterator(chunk_size=1000))
+
+
+def mark_dirty(teacher_id):
+    """把老师标记为待重算（计数行不存在时补建）"""
+    now = timezone.now()
+    if not TeacherKeywords.objects.filter(teacher_id=teacher_id).update(dirty_at=now):
+        TeacherKeywords.objects.bulk_create(
+            [TeacherKeywords(teacher_id=teacher_id, dirty_at=now)], ignore_conflicts=True
+        )
+        TeacherKeywords.objects.filter(teacher_id=teacher_id).update(dirty_at=now)
+    _ensure_refresher()
+
+
+def schedule_refresh(teacher_id):
+    """当前事务提交后把该老师标记为待重算（评分创建、删除、有效性变化时调用）"""
+    transaction.on_commit(lambda: mark_dirty(teacher_id))
+
+
+def refresh_teacher_keywords(teacher_id):
+    """认领并重算一位老师的关键词；已被其他进程认领（或不再待重算）时返回 None"""
+    row = TeacherKeywords.objects.filter(teacher_id=teacher_id).values_list('dirty_at', flat=True).first()
+    if row is None:
+        return None
+    claimed_at = timezone.now()
+    if not TeacherKeywords.objects.filter(teacher_id=teacher_id, dirty_at=row).update(dirty_at=None, claimed_at=claimed_at):
+        return None
+    keywords = compute_teacher_keywords(teacher_id)
+    TeacherKeywords.objects.filter(teacher_id=teacher_id, claimed_at=claimed_at).update(
+        keywords=keywords, updated_at=timezone.now()
+    )
+    return keywords
+
+
+def refresh_dirty(limit=None):
+    """重算一批待重算的老师（按标记时间先后），返回重算的老师数"""
+    limit = limit or getattr(settings, 'KEYWORDS_REFRESH_BATCH', 100)
+    teacher_ids = list(
+        TeacherKeywords.objects.filter(dirty_at__isnull=False)
+        .order_by('dirty_at').values_list('teacher_id', flat=True)[:limit]
+    )
+    return sum(refresh_teacher_keywords(teacher_id) is not None for teacher_id in teacher_ids)
+
+
+def mark_all_dirty():
+    """把所有老师标记为待重算（回填历史数据、调整提取规则后使用），返回老师数"""
+    now = timezone.now()
+    teacher_ids = list(Teacher.objects.values_list('teacher_id', flat=True))
+    TeacherKeywords.objects.bulk_create(
+        [TeacherKeywords(teacher_id=teacher_id, dirty_at=now) for teacher_id in teacher_ids],
+        ignore_conflicts=True, batch_size=1000,
+    )
+    TeacherKeywords.objects.update(dirty_at=now)
+    return len(teacher_ids)
+
+
+def get_teacher_keywords(teacher_id):
+    """读取已保存的关键词；尚未计算过时标记待重算并先返回空列表"""
+    row = TeacherKeywords.objects.filter(teacher_id=teacher_id).values_list('keywords', flat=True).first()
+    if row is None:
+        mark_dirty(teacher_id)
+        return []
+    return row
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def _refresh_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            while refresh_dirty():
+                pass
+        except Exception:
+            logger.exception('重算老师关键词失败')
+        finally:
+            close_old_connections()
+
+
+def _ensure_refresher():
+    """首次标记待重算时启动后台重算线程（KEYWORDS_REFRESH_INTERVAL_MS 为 0 时只依赖管理命令）"""
+    global _refresher
+    interval_ms = getattr(settings, 'KEYWORDS_REFRESH_INTERVAL_MS', 2000)
+    if _refresher is not None or interval_ms <= 0:
+        return
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(
+                target=_refresh_loop, args=(interval_ms / 1000,),
+                name='keywords-refresher', daemon=True,
+            )
+            _refresher.start()
@@ -0,0 +1,56 @@
+import math
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import hashers
+
+
+class Command(BaseCommand):
+    help = '测量各密码哈希器单次哈希的耗时，并按目标耗时给出参数建议（PASSWORD_* 设置）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=100, help='单次哈希的目标耗时（毫秒）')
+        parser.add_argument('--rounds', type=int, default=5, help='每个哈希器测量的次数，取中位数')
+
+    def measure(self, hasher, rounds):
+        salt = hasher.salt()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher.encode('benchmark-password', salt)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return timings[len(timings) // 2]
+
+    def handle(self, *args, **options):
+        target = options['target_ms']
+        rounds = max(options['rounds'], 1)
+
+        # (名称, 哈希器, 当前参数描述, 按耗时比例计算建议设置的函数)
+        candidates = [(
+            'pbkdf2', hashers.PBKDF2PasswordHasher(),
+            lambda h: f'iterations={h.iterations}',
+            lambda h, ratio: {'PASSWORD_PBKDF2_ITERATIONS': max(int(h.iterations * ratio / 1000) * 1000, 1000)},
+        ), (
+            'argon2', hashers.Argon2PasswordHasher(),
+            lambda h: f'time_cost={h.time_cost} memory_cost={h.memory_cost}',
+            lambda h, ratio: {'PASSWORD_ARGON2_TIME_COST': max(round(h.time_cost * ratio), 1)},
+        )]
+        if hasattr(hashers, 'ScryptPasswordHasher'):
+            candidates.append((
+                'scrypt', hashers.ScryptPasswordHasher(),
+                lambda h: f'work_factor={h.work_factor}',
+                # N 必须是 2 的幂，耗时和内存都与 N 成正比
+                lambda h, ratio: {'PASSWORD_SCRYPT_WORK_FACTOR': 2 ** max(round(math.log2(h.work_factor * ratio)), 1)},
+            ))
+
+        for name, hasher, describe, suggest in candidates:
+            try:
+                elapsed = self.measure(hasher, rounds)
+            except (ValueError, TypeError) as exc:
+                # argon2-cffi 未安装等情况
+                self.stdout.write(f'{name}: 不可用（{exc}）')
+                continue
+            suggested = ' '.join(f'{key}={value}' for key, value in suggest(hasher, target / elapsed).items())
+            self.stdout.write(f'{name}: {describe(hasher)} 耗时 {elapsed:.1f}ms，目标 {target:.0f}ms 建议 {suggested}')
@@ -0,0 +1,99 @@
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.sqlite3.base import apply_pragmas
+
+
+class Command(BaseCommand):
+    help = (
+        '对比 SQLite 默认参数与 SQLITE_PRAGMAS 调优参数下的并发读写吞吐量'
+        '（在临时数据库上模拟点赞：先读后写的短事务 + 并发列表查询）'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3, help='每种配置运行的秒数')
+        parser.add_argument('--writers', type=int, default=4, help='写线程数')
+        parser.add_argument('--readers', type=int, default=4, help='读线程数')
+        parser.add_argument('--rows', type=int, default=5000, help='测试表的行数')
+
+    def connect(self, path, tuned):
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        if tuned:
+            apply_pragmas(conn, settings.SQLITE_PRAGMAS)
+        return conn
+
+    def setup(self, path, rows, tuned):
+        conn = self.connect(path, tuned)
+        conn.execute('CREATE TABLE rating (id INTEGER PRIMARY KEY, likes INTEGER NOT NULL, reason TEXT NOT NULL)')
+        conn.executemany(
+            'INSERT INTO rating (id, likes, reason) VALUES (?, 0, ?)',
+            ((i, '评价内容' * 20) for i in range(1, rows + 1)),
+        )
+        conn.close()
+
+    def run_profile(self, tuned, options):
+        rows = options['rows']
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'bench.sqlite3')
+            self.setup(path, rows, tuned)
+            begin = 'BEGIN IMMEDIATE' if tuned else 'BEGIN'
+            stop = time.monotonic() + options['seconds']
+            stats = {'writes': 0, 'reads': 0, 'locked': 0}
+            lock = threading.Lock()
+
+            def count(key):
+                with lock:
+                    stats[key] += 1
+
+            def writer():
+                conn = self.connect(path, tuned)
+                while time.monotonic() < stop:
+                    rating_id = random.randint(1, rows)
+                    try:
+                        conn.execute(begin)
+                        conn.execute('SELECT likes FROM rating WHERE id = ?', (rating_id,)).fetchone()
+                        conn.execute('UPDATE rating SET likes = likes + 1 WHERE id = ?', (rating_id,))
+                        conn.execute('COMMIT')
+                        count('writes')
+                    except sqlite3.OperationalError:
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                        count('locked')
+                conn.close()
+
+            def reader():
+                conn = self.connect(path, tuned)
+                while time.monotonic() < stop:
+                    start = random.randint(1, rows)
+                    try:
+                        conn.execute(
+                            'SELECT id, likes, reason FROM rating WHERE id >= ? ORDER BY id LIMIT 50', (start,)
+                        ).fetchall()
+                        count('reads')
+                    except sqlite3.OperationalError:
+                        count('locked')
+                conn.close()
+
+            threads = [threading.Thread(target=writer) for _ in range(options['writers'])]
+            threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return stats
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        for name, tuned in (('默认参数', False), ('调优参数', True)):
+            stats = self.run_profile(tuned, options)
+            self.stdout.write(
+                f"{name}: 写 {stats['writes'] / seconds:.0f} 次/秒，读 {stats['reads'] / seconds:.0f} 次/秒，"
+                f"database is locked {stats['locked']} 次"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import vote_buffer
+
+
+class Command(BaseCommand):
+    help = '把点赞/点踩写后缓冲中尚未写回的计数增量批量写入数据库'
+
+    def handle(self, *args, **options):
+        updated = vote_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f'点赞缓冲写回完成，共更新 {updated} 条评分'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = '分批删除已过期的登录 Token（每批一个短事务，不长时间锁表）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批删除的行数')
+        parser.add_argument('--sleep', type=float, default=0, help='每批之间暂停的秒数，减轻数据库压力')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # 按 expires_at 索引取一批主键再删除，避免一条 DELETE 长时间持有锁
+            keys = list(
+                AuthToken.objects.filter(expires_at__lte=now).values_list('key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted += AuthToken.objects.filter(key__in=keys).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'已删除 {deleted} 个过期 Token'))
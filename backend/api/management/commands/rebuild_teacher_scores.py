@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api import versions
+from api.scores import rebuild_teacher_scores
+
+
+class Command(BaseCommand):
+    help = '从 Rating 全量重建 TeacherScore 汇总表（修复统计漂移、回填历史数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--teacher', type=int, action='append', dest='teacher_ids',
+            help='只重建指定老师（可重复传入），默认重建全部',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的行数')
+
+    def handle(self, *args, **options):
+        rows = rebuild_teacher_scores(
+            teacher_ids=options['teacher_ids'],
+            batch_size=options['batch_size'],
+        )
+        versions.bump_all()
+        self.stdout.write(self.style.SUCCESS(f'TeacherScore 重建完成，共写入 {rows} 行'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import keywords
+
+
+class Command(BaseCommand):
+    help = '重算待重算老师的评论关键词（后台线程关闭时可定时执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='先把所有老师标记为待重算（回填历史数据）')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            keywords.mark_all_dirty()
+        refreshed = 0
+        while True:
+            count = keywords.refresh_dirty()
+            if not count:
+                break
+            refreshed += count
+        self.stdout.write(self.style.SUCCESS(f'关键词重算完成，共 {refreshed} 位老师'))
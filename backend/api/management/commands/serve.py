@@ -0,0 +1,54 @@
+import os
+import shlex
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        '以生产模式启动后端：gunicorn 主进程 + 多个预派生工作进程（配置见 gunicorn.conf.py，'
+        '可用环境变量调整）。用法与 runserver 相同，例如 python manage.py serve 0.0.0.0:5009'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('addrport', nargs='?', help='监听地址，如 0.0.0.0:5009 或 5009（默认 HOST:PORT 环境变量）')
+        parser.add_argument('--workers', type=int, help='工作进程数（默认 WEB_CONCURRENCY 或 CPU 核数 × 2 + 1）')
+        parser.add_argument('--threads', type=int, help='每个工作进程的线程数（默认 GUNICORN_THREADS 或 4）')
+        parser.add_argument('--timeout', type=int, help='单个请求最长处理时间（秒）')
+        parser.add_argument('--print', action='store_true', dest='print_only', help='只打印启动命令，不启动')
+
+    def handle(self, *args, **options):
+        base_dir = Path(settings.BASE_DIR)
+        argv = [
+            sys.executable, '-m', 'gunicorn',
+            '--config', str(base_dir / 'gunicorn.conf.py'),
+            '--chdir', str(base_dir),
+        ]
+
+        addrport = options['addrport']
+        if addrport:
+            if ':' not in addrport:
+                addrport = f"{os.getenv('HOST', '0.0.0.0')}:{addrport}"
+            argv += ['--bind', addrport]
+        for option in ('workers', 'threads', 'timeout'):
+            if options[option] is not None:
+                argv += [f'--{option}', str(options[option])]
+        if options['threads'] is not None:
+            argv += ['--worker-class', 'gthread' if options['threads'] > 1 else 'sync']
+        argv.append('backend.wsgi:application')
+
+        if options['print_only']:
+            self.stdout.write(shlex.join(argv))
+            return
+
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('未安装 gunicorn，请先执行 pip install -r requirements.txt')
+
+        # 用 gunicorn 主进程替换当前进程：PID 不变，stop.sh 的 kill 和 HUP 平滑重载直接作用于主进程
+        sys.stdout.flush()
+        os.execv(sys.executable, argv)
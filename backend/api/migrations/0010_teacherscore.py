@@ -0,0 +1,77 @@
+from datetime import date
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+from django.utils import timezone
+
+
+SCORE_MAP = {'T1': 5, 'T2': 10, 'T3': 15}
+
+
+def _semester_start(day):
+    if day.month >= 9:
+        return date(day.year, 9, 1)
+    if day.month == 1:
+        return date(day.year - 1, 9, 1)
+    return date(day.year, 2, 1)
+
+
+def backfill_teacher_scores(apps, schema_editor):
+    """根据现有有效评分回填 TeacherScore（日/月/学期三个时间桶）"""
+    Rating = apps.get_model('api', 'Rating')
+    TeacherScore = apps.get_model('api', 'TeacherScore')
+
+    totals = {}
+    ratings = Rating.objects.filter(dislikes__lte=F('likes')).values_list('teacher_id', 'tier', 'created_at')
+    for teacher_id, tier, created_at in ratings.iterator(chunk_size=1000):
+        day = timezone.localdate(created_at)
+        for period, period_start in (
+            ('day', day),
+            ('month', day.replace(day=1)),
+            ('semester', _semester_start(day)),
+        ):
+            row = totals.setdefault(
+                (teacher_id, period, period_start),
+                {'t1': 0, 't2': 0, 't3': 0, 'count': 0, 'total_score': 0},
+            )
+            row[tier.lower()] += 1
+            row['count'] += 1
+            row['total_score'] += SCORE_MAP[tier]
+
+    TeacherScore.objects.bulk_create(
+        [
+            TeacherScore(teacher_id=teacher_id, period=period, period_start=period_start, **values)
+            for (teacher_id, period, period_start), values in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_comment_commentinteraction_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherScore',
+            fields=[
+                ('score_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month'), ('semester', 'Semester')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('t1', models.IntegerField(default=0)),
+                ('t2', models.IntegerField(default=0)),
+                ('t3', models.IntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('total_score', models.IntegerField(default=0)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='api.teacher')),
+            ],
+            options={
+                'unique_together': {('teacher', 'period', 'period_start')},
+                'indexes': [models.Index(fields=['period', 'period_start', 'teacher'], name='api_teacher_period_661a50_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_teacher_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0010_teacherscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTierUsage',
+            fields=[
+                ('usage_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_date', models.DateField()),
+                ('t1_used', models.PositiveIntegerField(default=0)),
+                ('t2_used', models.PositiveIntegerField(default=0)),
+                ('t3_used', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'usage_date')},
+            },
+        ),
+    ]
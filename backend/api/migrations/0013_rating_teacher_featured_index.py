@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_teacherkeywords'),
+    ]
+
+    operations = [
+        # is_featured 列已由 0008 通过 RunPython 按需添加，这里只把字段补进迁移状态，不改数据库
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='rating',
+                    name='is_featured',
+                    field=models.BooleanField(default=False, help_text='管理员设置的优质评分，将自动置顶', verbose_name='神评'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['teacher', 'is_featured', 'created_at'], name='api_rating_teacher_d14e9b_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def copy_existing_tokens(apps, schema_editor):
+    """把 rest_framework.authtoken 中已有的永久 Token 迁移为新令牌，已登录用户无需重新登录"""
+    try:
+        Token = apps.get_model('authtoken', 'Token')
+    except LookupError:
+        return
+    AuthToken = apps.get_model('api', 'AuthToken')
+    expires_at = timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 7 * 24 * 3600))
+    batch = []
+    for key, user_id in Token.objects.values_list('key', 'user_id').iterator(chunk_size=1000):
+        batch.append(AuthToken(key=key, user_id=user_id, device='legacy', expires_at=expires_at))
+        if len(batch) >= 1000:
+            AuthToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    AuthToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('authtoken', '0003_tokenproxy'),
+        ('api', '0013_rating_teacher_featured_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('device', models.CharField(blank=True, max_length=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at'], name='api_authtok_user_id_0d184a_idx')],
+            },
+        ),
+        migrations.RunPython(copy_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_rating_school(apps, schema_editor):
+    """按评分所属老师的学校回填 Rating.school（一条 UPDATE ... SET school_id = (SELECT ...)）"""
+    Rating = apps.get_model('api', 'Rating')
+    Teacher = apps.get_model('api', 'Teacher')
+    Rating.objects.update(
+        school_id=models.Subquery(Teacher.objects.filter(pk=models.OuterRef('teacher_id')).values('school_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_user_email_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='school',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='api.school'),
+        ),
+        migrations.RunPython(fill_rating_school, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['school', 'created_at', 'rating_id'], name='api_rating_school__ab3909_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_rating_school'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='semester_starts',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['created_at', 'rating_id'], name='api_rating_created_273d57_idx'),
+        ),
+    ]
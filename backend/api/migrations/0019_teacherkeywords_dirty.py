@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherkeywords',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='teacherkeywords',
+            name='dirty_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='teacherkeywords',
+            index=models.Index(fields=['dirty_at'], name='api_teacher_dirty_a_4f2a97_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class School(models.Model):
@@ -12,6 +13,8 @@ class School(models.Model):
     daily_t1_limit = models.PositiveIntegerField(default=3)  # T1每日限制
     daily_t2_limit = models.PositiveIntegerField(default=2)  # T2每日限制
     daily_t3_limit = models.PositiveIntegerField(default=1)  # T3每日限制
+    # 学期起始日期（'YYYY-MM-DD' 列表），用于 semester 时间范围；为空时按默认 9 月/2 月划分
+    semester_starts = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -68,6 +71,9 @@ class User(AbstractUser):
     # on_delete=models.SET_NULL: 如果学校被删除，用户的school字段设为NULL（不删除用户）
     # null=True, blank=True: 允许用户没有关联学校
     school = models.ForeignKey(School, on_delete=models.SET_NULL, null=True, blank=True)
+
+    # 邮箱：覆盖 AbstractUser 的同名字段以加上索引，登录时按用户名或邮箱查找用户
+    email = models.EmailField('email address', blank=True, db_index=True)
     
     # ========== 审批状态常量 ==========
     # 用于控制新用户注册后的审批流程
@@ -171,6 +177,8 @@ class Rating(models.Model):
 
     rating_id = models.AutoField(primary_key=True)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='ratings')
+    # 冗余保存老师所在学校（与 teacher.school 保持一致），评分列表按学校过滤时不必关联老师表
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='ratings', null=True, blank=True, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ratings')
     tier = models.CharField(max_length=2, choices=TIER_CHOICES)
     reason = models.TextField(max_length=200)
@@ -184,6 +192,12 @@ class Rating(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'teacher', 'created_at']),
+            # 老师详情页：按老师取评分，神评置顶、时间倒序
+            models.Index(fields=['teacher', 'is_featured', 'created_at']),
+            # 评分列表：按学校取评分，按 (created_at, rating_id) 倒序分页
+            models.Index(fields=['school', 'created_at', 'rating_id']),
+            # 超级管理员/无学校用户按时间范围（?range= / ?since= / ?until=）取评分
+            models.Index(fields=['created_at', 'rating_id']),
         ]
 
     def __str__(self):
@@ -237,3 +251,123 @@ class UserInteraction(models.Model):
     def __str__(self):
         return f'{self.user} {self.interaction_type} {self.rating}'
 
+
+
+class TeacherScore(models.Model):
+    """
+    老师得分汇总（物化统计表）
+
+    按时间桶（日/月/学期）记录每位老师的有效 T1/T2/T3 次数和加权总分，
+    由评分创建、删除以及点赞/点踩（评分有效性变化时）增量维护。
+    排行榜直接读取此表，不再扫描 Rating。
+    可通过 `python manage.py rebuild_teacher_scores` 全量重建。
+    """
+    PERIOD_DAY = 'day'
+    PERIOD_MONTH = 'month'
+    PERIOD_SEMESTER = 'semester'
+    PERIOD_CHOICES = (
+        (PERIOD_DAY, 'Day'),
+        (PERIOD_MONTH, 'Month'),
+        (PERIOD_SEMESTER, 'Semester'),
+    )
+
+    score_id = models.BigAutoField(primary_key=True)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='scores')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # 时间桶起始日期（Asia/Shanghai 本地日期）
+    t1 = models.IntegerField(default=0)
+    t2 = models.IntegerField(default=0)
+    t3 = models.IntegerField(default=0)
+    count = models.IntegerField(default=0)  # 有效评分数 = t1 + t2 + t3
+    total_score = models.IntegerField(default=0)  # 加权总分 = t1*5 + t2*10 + t3*15
+
+    class Meta:
+        unique_together = ('teacher', 'period', 'period_start')
+        indexes = [
+            models.Index(fields=['period', 'period_start', 'teacher']),
+        ]
+
+    def __str__(self):
+        return f'{self.teacher} {self.period} {self.period_start} {self.total_score}'
+
+
+class DailyTierUsage(models.Model):
+    """
+    每个用户每天各等级已用评分次数（计数行）
+
+    评分时在同一事务中执行 UPDATE ... SET tN_used = tN_used + 1 WHERE tN_used < 限额，
+    由数据库保证并发提交不会超过学校的 daily_tN_limit；只锁当前用户当天的一行。
+    """
+    usage_id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_usages')
+    usage_date = models.DateField()  # Asia/Shanghai 本地日期
+    t1_used = models.PositiveIntegerField(default=0)
+    t2_used = models.PositiveIntegerField(default=0)
+    t3_used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'usage_date')
+
+    def __str__(self):
+        return f'{self.user} {self.usage_date} T1={self.t1_used} T2={self.t2_used} T3={self.t3_used}'
+
+
+class TeacherKeywords(models.Model):
+    """
+    老师评论关键词（物化结果）
+
+    由 api/keywords.py 根据该老师的有效评分计算。评分创建、删除或有效性变化后只记录 dirty_at，
+    由后台线程或 `python manage.py refresh_keywords` 在请求之外合并重算；
+    claimed_at 为最近一次重算的认领时间，重算结果只在认领未被更新的认领覆盖时写回。
+    """
+    teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE, primary_key=True, related_name='keyword_cache')
+    keywords = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    dirty_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dirty_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.teacher} {self.keywords}'
+
+
+class AuthToken(models.Model):
+    """
+    登录令牌（替代 rest_framework.authtoken 的永久 Token）
+
+    - 每次登录签发一个新令牌，同一用户可在多台设备上各持有一个
+    - expires_at 到期后失效；使用中的令牌剩余时间不足一半时自动续期（滑动过期）
+    - 过期令牌由 `python manage.py purge_expired_tokens` 分批清理
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='auth_tokens')
+    device = models.CharField(max_length=128, blank=True)  # 登录设备（User-Agent 摘要），便于识别
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.device} {self.expires_at}'
+
+
+class DataVersion(models.Model):
+    """
+    数据版本计数器（条件 GET 的 ETag / Last-Modified，见 api/versions.py）
+
+    scope 为学校代码，每个学校一行。评分、点赞/点踩、老师、学校等写操作成功后递增对应学校的版本，
+    全站版本取各学校版本号之和；读接口用版本号判断客户端缓存是否仍然有效，未变化时直接返回 304。
+    """
+    scope = models.CharField(max_length=32, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.scope} v{self.version}'
@@ -0,0 +1,148 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class LeaderboardPagination(PageNumberPagination):
+    """排行榜分页：?page=2&page_size=50"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    基于排序键的游标分页（keyset pagination），按需启用。
+
+    - 请求未携带 cursor / page_size 参数时不分页，保持返回完整列表（兼容旧前端）
+    - 携带时返回 {"next": <下一页URL或null>, "results": [...]}
+    - 游标编码上一页最后一行的排序键值，下一页通过 WHERE (k1, k2) < (v1, v2) 定位，
+      与 OFFSET 不同，翻页代价不随页数增长
+
+    子类通过 ordering 指定排序键，最后一个字段必须唯一（通常是主键）。
+    optional = False 时总是分页；base_url 可把下一页链接指向另一个接口。
+    """
+    ordering = ('pk',)
+    optional = True
+    base_url = None
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '无效的 cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.optional and (self.cursor_query_param not in request.query_params
+                              and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.page_size = self.get_page_size(request)
+        self.pk_name = queryset.model._meta.pk.name
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after_q(queryset.model, self.decode_cursor(cursor)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def after_q(self, model, values):
+        """构造“排在游标之后”的条件：(k1 < v1) OR (k1 = v1 AND k2 < v2) ...（升序字段用 >）"""
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            value = self.to_python(model, name, value)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def to_python(self, model, name, value):
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        try:
+            return field.to_python(value)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                # 快速序列化（api/fast_serializers.py）分页的是 .values() 行
+                value = instance[self.pk_name if name == 'pk' else name]
+            else:
+                value = getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.base_url or self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PrimaryKeyCursorPagination(KeysetCursorPagination):
+    """按主键升序的游标分页（老师、用户等列表的默认分页）"""
+    ordering = ('pk',)
+
+
+class RatingCursorPagination(KeysetCursorPagination):
+    """评分列表：按 (created_at, rating_id) 倒序，最新的在前"""
+    ordering = ('-created_at', '-rating_id')
+
+
+class TeacherRatingCursorPagination(KeysetCursorPagination):
+    """老师详情页评分：神评置顶，其余按时间倒序；总是分页（索引 teacher, is_featured, created_at）"""
+    ordering = ('-is_featured', '-created_at', '-rating_id')
+    optional = False
+    page_size = 20
@@ -0,0 +1,142 @@
+"""
+登录时的密码校验：放到独立的进程池中执行，并限制排队数量。
+
+PBKDF2 每次校验要消耗 100~200ms CPU，早高峰大量学生同时登录时会占满 Web 工作进程，
+拖慢所有其他接口。这里把哈希计算交给 PASSWORD_HASH_WORKERS 个子进程：
+- 正在计算和排队的校验总数超过 PASSWORD_HASH_MAX_PENDING 时，立即抛出 HashingBusy，
+  登录接口返回 429，客户端稍后重试，而不是让请求在工作进程里堆积
+- 等待超过 PASSWORD_HASH_TIMEOUT 秒同样按繁忙处理，但这次校验在算完之前仍占用排队名额
+- 密码正确但哈希算法或参数已过时（见 api/hashers.py）时，子进程顺便按首选哈希器重新哈希，
+  这里用条件 UPDATE 写回，用户无感知地迁移到新参数
+
+PASSWORD_HASH_WORKERS 为 0 时在当前线程内计算，仍然受排队数量限制。
+进程池按 Web 工作进程各建一个，默认大小按整机核数除以 WEB_CONCURRENCY 计算（见 settings）。
+子进程使用 spawn 方式启动并各自加载 Django 设置，进程池在首次登录时按需创建。
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+class HashingBusy(Exception):
+    """密码校验排队已满或等待超时"""
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_slots = None
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _verify(password, encoded):
+    """在子进程中执行：返回 (密码是否正确, 需要升级时的新哈希)"""
+    from django.contrib.auth.hashers import check_password, make_password
+
+    rehashed = []
+    valid = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, (rehashed[0] if rehashed else None)
+
+
+def _dummy(password):
+    """用户不存在时也计算一次哈希，避免通过响应时间判断用户是否存在"""
+    from django.contrib.auth.hashers import make_password
+
+    make_password(password)
+    return False, None
+
+
+def _get_pool():
+    global _pool, _pool_pid
+    workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+    if workers <= 0:
+        return None
+    # gunicorn 等预加载后 fork 的工作进程不能沿用父进程的进程池
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),),
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _get_slots():
+    global _slots
+    if _slots is None:
+        with _pool_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(getattr(settings, 'PASSWORD_HASH_MAX_PENDING', 32))
+    return _slots
+
+
+def _run(func, *args):
+    slots = _get_slots()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        pool = _get_pool()
+        if pool is None:
+            try:
+                return func(*args)
+            finally:
+                slots.release()
+        future = pool.submit(func, *args)
+    except BrokenProcessPool:
+        slots.release()
+        # 子进程异常退出，下次调用时重建进程池
+        _reset_pool(pool)
+        raise HashingBusy()
+    except Exception:
+        slots.release()
+        raise
+
+    # 名额在子进程真正算完时才归还：等待超时的校验仍占用子进程，继续计入排队数
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=getattr(settings, 'PASSWORD_HASH_TIMEOUT', 10))
+    except TimeoutError:
+        future.cancel()
+        raise HashingBusy()
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise HashingBusy()
+
+
+def check_password(user, password):
+    """
+    校验用户密码，正确返回 True。user 为 None 时仍计算一次哈希并返回 False。
+
+    繁忙时抛出 HashingBusy。密码正确且需要升级哈希时，把新哈希写回数据库并更新 user.password。
+    """
+    if user is None:
+        return _run(_dummy, password)[0]
+
+    encoded = user.password
+    valid, rehashed = _run(_verify, password, encoded)
+    if valid and rehashed:
+        # 只在密码未被并发修改时写回
+        type(user).objects.filter(pk=user.pk, password=encoded).update(password=rehashed)
+        user.password = rehashed
+    return valid
@@ -0,0 +1,108 @@
+"""
+每日评分额度（按等级 T1/T2/T3 分别限额）。
+
+- 评分时通过 reserve 在 DailyTierUsage 计数行上做条件 UPDATE 占用额度，并发提交也不会超限
+- 今日已用次数直接读取这一行（按 (user, usage_date) 唯一索引取一行），与额度判断使用同一份数据，
+  任何工作进程写入后其他进程立即可见，不在进程内缓存
+- 当天还没有计数行时，用一条 values('tier').annotate(Count) 查询统计 UserVote
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import DailyTierUsage, UserVote
+
+
+TIERS = ('T1', 'T2', 'T3')
+
+# 用户没有学校时的默认每日限额
+DEFAULT_TIER_LIMITS = {'T1': 3, 'T2': 2, 'T3': 1}
+
+def tier_limits(user):
+    """返回用户所在学校的各等级每日限额"""
+    school = user.school
+    if school is None:
+        return dict(DEFAULT_TIER_LIMITS)
+    return {
+        'T1': school.daily_t1_limit,
+        'T2': school.daily_t2_limit,
+        'T3': school.daily_t3_limit,
+    }
+
+
+def _count_votes(user, day):
+    """一条 GROUP BY 查询统计用户某天各等级的 UserVote 数"""
+    counts = dict.fromkeys(TIERS, 0)
+    rows = (
+        UserVote.objects.filter(user=user, vote_date=day)
+        .values('tier')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['tier']] = row['n']
+    return counts
+
+
+def used_today(user):
+    """返回 {'T1': n, 'T2': n, 'T3': n}：用户今日各等级已用次数"""
+    today = timezone.localdate()
+    row = (
+        DailyTierUsage.objects.filter(user=user, usage_date=today)
+        .values_list('t1_used', 't2_used', 't3_used')
+        .first()
+    )
+    if row is not None:
+        return dict(zip(TIERS, row))
+    return _count_votes(user, today)
+
+
+def reserve(user, tier, day):
+    """
+    在调用方的事务中占用一次 tier 等级的额度，已达上限时返回 False。
+
+    UPDATE ... SET tN_used = tN_used + 1 WHERE tN_used < limit 由数据库原子判断，
+    不存在“先 COUNT 再 INSERT”的竞态；当天的计数行不存在时按 UserVote 现有记录初始化。
+    """
+    limit = tier_limits(user).get(tier, 0)
+    field = f'{tier.lower()}_used'
+    usage = DailyTierUsage.objects.filter(user=user, usage_date=day)
+
+    def take():
+        return usage.filter(**{f'{field}__lt': limit}).update(**{field: F(field) + 1}) > 0
+
+    if take():
+        return True
+    if usage.exists():
+        return False
+
+    counts = _count_votes(user, day)
+    try:
+        with transaction.atomic():
+            DailyTierUsage.objects.create(
+                user=user, usage_date=day,
+                t1_used=counts['T1'], t2_used=counts['T2'], t3_used=counts['T3'],
+            )
+    except IntegrityError:
+        # 同一用户并发提交，另一请求已创建计数行
+        pass
+    return take()
+
+
+def get_quota(user):
+    """额度接口的返回数据：按等级分别返回 limit/used/remaining，并保留旧版本的合计字段"""
+    limits = tier_limits(user)
+    used = used_today(user)
+    data = {
+        tier: {
+            'limit': limits[tier],
+            'used': used[tier],
+            'remaining': max(limits[tier] - used[tier], 0),
+        }
+        for tier in TIERS
+    }
+    # 兼容旧版本
+    data['limit'] = sum(limits.values())
+    data['used'] = sum(used.values())
+    data['remaining'] = sum(data[tier]['remaining'] for tier in TIERS)
+    return data
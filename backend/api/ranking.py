@@ -0,0 +1,206 @@
+"""
+排名计算工具（服务端版本）
+
+与前端 src/utils/ranking.js 保持一致的计分规则：
+- T1 = 5 分，T2 = 10 分，T3 = 15 分
+- 踩多于赞（dislikes > likes）的评分视为失效，不计入统计
+- 时间范围：today / month / semester / year / all，按 Asia/Shanghai 本地时间计算，
+  学期起始日期可按学校配置（School.semester_starts）
+
+统计读取 TeacherScore 汇总表（见 api/scores.py），避免扫描 Rating 或把整张评分表下发到浏览器。
+"""
+from datetime import date, datetime, timedelta
+
+import django
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Teacher, TeacherScore
+
+
+# Django 4.2 起才支持按窗口函数的结果过滤（requirements-compat.txt 中的 Django 3.2 不支持）
+WINDOW_FILTER_SUPPORTED = django.VERSION >= (4, 2)
+
+
+SCORE_MAP = {
+    'T1': 5,
+    'T2': 10,
+    'T3': 15,
+}
+
+TIME_RANGES = ('today', 'month', 'semester', 'year', 'all')
+
+# 排行榜排序：总分降序，分数相同按有效评分数降序，最后按 teacher_id 保证稳定
+LEADERBOARD_ORDERING = ('-total_score', '-count', 'teacher_id')
+
+
+def semester_start(day, starts=None):
+    """
+    返回 day 所在学期的起始日期。
+
+    starts 为学校配置的学期起始日期（date 列表，见 School.semester_starts）：
+    取其中不晚于 day 的最近一个；没有配置或都晚于 day 时按默认划分：
+    9月-次年1月为第一学期，2-8月为第二学期（含暑假），1月份属于上一年 9 月开始的学期。
+    """
+    configured = [start for start in starts or () if start <= day]
+    if configured:
+        return max(configured)
+    if day.month >= 9:
+        return date(day.year, 9, 1)
+    if day.month == 1:
+        return date(day.year - 1, 9, 1)
+    return date(day.year, 2, 1)
+
+
+def parse_semester_starts(values):
+    """把 School.semester_starts 中的 'YYYY-MM-DD' 字符串解析为排序后的 date 列表，格式错误时抛出 ValueError"""
+    if not isinstance(values, (list, tuple)):
+        raise ValueError('学期起始日期必须是 YYYY-MM-DD 字符串列表')
+    return sorted({date.fromisoformat(str(value)) for value in values})
+
+
+def school_semester_starts(school):
+    """学校配置的学期起始日期，未配置或配置有误时返回空列表（使用默认划分）"""
+    if school is None:
+        return []
+    try:
+        return parse_semester_starts(school.semester_starts or [])
+    except ValueError:
+        return []
+
+
+def range_start(time_range, now=None, school=None):
+    """返回时间范围的起始时间（带时区），'all' 或未知范围返回 None。semester 按 school 的学期配置计算。"""
+    if time_range not in TIME_RANGES or time_range == 'all':
+        return None
+
+    local_now = timezone.localtime(now)
+    year, month = local_now.year, local_now.month
+
+    if time_range == 'today':
+        start = datetime(year, month, local_now.day)
+    elif time_range == 'month':
+        start = datetime(year, month, 1)
+    elif time_range == 'semester':
+        first_day = semester_start(local_now.date(), school_semester_starts(school))
+        start = datetime(first_day.year, first_day.month, first_day.day)
+    else:  # year
+        start = datetime(year, 1, 1)
+
+    return timezone.make_aware(start)
+
+
+def parse_time_bound(value, end=False):
+    """
+    解析 ?since= / ?until= 参数：ISO 日期时间或 YYYY-MM-DD 日期（按 Asia/Shanghai 本地时间）。
+
+    日期作为 until（end=True）时包含当天，返回次日零点；格式错误时抛出 ValueError。
+    """
+    # 先按纯日期解析：Python 3.11 起 datetime.fromisoformat 也接受 'YYYY-MM-DD'
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        moment = datetime(day.year, day.month, day.day)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def valid_rating_q(prefix=''):
+    """有效评分条件：dislikes <= likes。prefix 用于跨关系查询，例如 'ratings__'。"""
+    return Q(**{f'{prefix}dislikes__lte': F(f'{prefix}likes')})
+
+
+def score_bucket_q(time_range, now=None, school=None):
+    """
+    时间范围对应的 TeacherScore 时间桶条件（相对 teacher 的 scores__ 关系）。
+
+    today/month/semester 各命中一个桶；year 汇总本年度的月桶；
+    all 汇总所有学期桶（学期桶覆盖全年，互不重叠）。
+    学期桶按默认学期划分；school 配置了自己的学期起始日期时，semester 改为汇总本学期的日桶。
+    """
+    today = timezone.localdate(now)
+    starts = school_semester_starts(school)
+    if time_range == 'semester' and starts:
+        return Q(scores__period=TeacherScore.PERIOD_DAY, scores__period_start__gte=semester_start(today, starts))
+    if time_range == 'today':
+        return Q(scores__period=TeacherScore.PERIOD_DAY, scores__period_start=today)
+    if time_range == 'month':
+        return Q(scores__period=TeacherScore.PERIOD_MONTH, scores__period_start=today.replace(day=1))
+    if time_range == 'semester':
+        return Q(scores__period=TeacherScore.PERIOD_SEMESTER, scores__period_start=semester_start(today))
+    if time_range == 'year':
+        return Q(scores__period=TeacherScore.PERIOD_MONTH, scores__period_start__gte=date(today.year, 1, 1))
+    return Q(scores__period=TeacherScore.PERIOD_SEMESTER)
+
+
+def annotate_teacher_stats(teacher_qs, time_range='all', now=None, school=None):
+    """
+    为老师查询集添加 T1/T2/T3 计数、有效评分数 count 和加权总分 total_score。
+
+    从 TeacherScore 汇总表读取，一条 GROUP BY 查询完成；没有评分的老师统计为 0。
+    school 为排行榜所属学校，用于按该校的学期配置计算 semester。
+    """
+    bucket = score_bucket_q(time_range, now, school)
+
+    def total(field):
+        return Coalesce(Sum(f'scores__{field}', filter=bucket), 0)
+
+    return teacher_qs.annotate(
+        t1=total('t1'),
+        t2=total('t2'),
+        t3=total('t3'),
+        count=total('count'),
+        total_score=total('total_score'),
+    )
+
+
+def school_rank(teacher, time_range='all', now=None):
+    """
+    返回 (rank, total)：已注解统计的 teacher 在本校排行榜中的名次和本校老师总数。
+
+    名次与排行榜排序（LEADERBOARD_ORDERING）一致，一条聚合查询完成。
+    """
+    ahead = (
+        Q(total_score__gt=teacher.total_score)
+        | Q(total_score=teacher.total_score, count__gt=teacher.count)
+        | Q(total_score=teacher.total_score, count=teacher.count, teacher_id__lt=teacher.teacher_id)
+    )
+    result = annotate_teacher_stats(
+        Teacher.objects.filter(school_id=teacher.school_id), time_range, now, teacher.school
+    ).aggregate(ahead=Count('teacher_id', filter=ahead), total=Count('teacher_id'))
+    return result['ahead'] + 1, result['total']
+
+
+def top_ratings_for_teachers(rating_qs, teacher_ids, since=None, limit=3):
+    """
+    每位老师的精选评论（最多 limit 条）：神评优先，其次按点赞数、时间降序，排除失效评分。
+
+    一次查询取出整页老师的精选评论，返回 {teacher_id: [Rating, ...]}。
+    Django 4.2+ 用窗口函数 ROW_NUMBER() 过滤；更早的版本不支持按窗口函数过滤，
+    改为每条评分用关联子查询判断是否在该老师的前 limit 条之内。
+    """
+    qs = rating_qs.filter(teacher_id__in=teacher_ids).filter(valid_rating_q())
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    ordering = [F('is_featured').desc(), F('likes').desc(), F('created_at').desc(), F('rating_id').desc()]
+
+    if WINDOW_FILTER_SUPPORTED:
+        qs = qs.annotate(
+            row_number=Window(expression=RowNumber(), partition_by=[F('teacher_id')], order_by=ordering)
+        ).filter(row_number__lte=limit).order_by('teacher_id', 'row_number')
+    else:
+        top = qs.filter(teacher_id=OuterRef('teacher_id')).order_by(*ordering).values('pk')[:limit]
+        qs = qs.filter(pk__in=Subquery(top)).order_by('teacher_id', *ordering)
+
+    grouped = {teacher_id: [] for teacher_id in teacher_ids}
+    for rating in qs:
+        grouped.setdefault(rating.teacher_id, []).append(rating)
+    return grouped
@@ -0,0 +1,69 @@
+"""
+列表接口的响应缓存（老师、学校、部门列表）。
+
+这些列表对同一学校的所有用户返回相同内容，缓存渲染后的 JSON 字节：
+
+- 缓存键：视图集 + action、用户可见范围（学校代码或全站 '*'）、该范围的数据版本号（api/versions.py）、
+  完整 URL（含分页、搜索等查询参数）和响应格式。写操作递增数据版本后旧键不再被命中，无需逐条删除
+- 命中时直接返回缓存的字节，不执行查询集、不实例化序列化器、不渲染 JSON；ETag 等校验头照常添加
+- 只缓存 JSON 格式的 200 响应（可浏览 API 的 HTML 页面不缓存）
+
+缓存存放在 Django cache 的 RESPONSE_CACHE 别名下（settings.py 中由 RESPONSE_CACHE_BACKEND 选择）：
+单机使用按条目数和总字节数 LRU 淘汰的进程内缓存，多进程部署可改用文件缓存在工作进程间共享。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from . import versions
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE', 'default')]
+
+
+def cache_key(view, request):
+    scope, version, _ = versions.request_version(request)
+    source = f'{request.accepted_media_type}|{request.build_absolute_uri()}'
+    digest = hashlib.sha256(source.encode()).hexdigest()[:32]
+    return f'resp:{view.basename}:{view.action}:{scope}:{version}:{digest}'
+
+
+class CachedResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ResponseCacheMixin:
+    """
+    视图集混入：cached_actions 中的 GET 接口缓存渲染后的 JSON 响应。
+    需放在 ConditionalGetMixin 之前：先处理 If-None-Match（304），再查响应缓存。
+    """
+    cached_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        if request.method == 'GET' and self.action in self.cached_actions \
+                and request.accepted_renderer.format == 'json':
+            self._response_cache_key = cache_key(self, request)
+            cached = _cache().get(self._response_cache_key)
+            if cached is not None:
+                content, content_type = cached
+                raise CachedResponse(HttpResponse(content, content_type=content_type))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CachedResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            _cache().set(key, (response.content, response['Content-Type']))
+        return response
@@ -0,0 +1,141 @@
+"""
+TeacherScore 汇总表的增量维护与全量重建。
+
+一条评分在其创建时间（Asia/Shanghai 本地日期）所在的日、月、学期三个时间桶中计数，
+且只有有效评分（dislikes <= likes）才计入。调用方需在同一事务中修改 Rating 并调用这里的函数。
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Rating, TeacherScore
+from .ranking import SCORE_MAP, semester_start, valid_rating_q
+
+
+def is_valid(likes, dislikes):
+    """踩多于赞的评分视为失效"""
+    return (dislikes or 0) <= (likes or 0)
+
+
+def score_buckets(created_at):
+    """评分所属的 (period, period_start) 时间桶列表"""
+    day = timezone.localdate(created_at)
+    return [
+        (TeacherScore.PERIOD_DAY, day),
+        (TeacherScore.PERIOD_MONTH, day.replace(day=1)),
+        (TeacherScore.PERIOD_SEMESTER, semester_start(day)),
+    ]
+
+
+def apply_rating(rating, delta):
+    """
+    将一条评分计入（delta=1）或移出（delta=-1）其所在的全部时间桶。
+
+    使用 F() 表达式原子更新，桶不存在时创建；并发创建同一个桶时回退为更新。
+    """
+    tier_field = rating.tier.lower()
+    changes = {
+        tier_field: delta,
+        'count': delta,
+        'total_score': delta * SCORE_MAP[rating.tier],
+    }
+    for period, period_start in score_buckets(rating.created_at):
+        bucket = TeacherScore.objects.filter(
+            teacher_id=rating.teacher_id, period=period, period_start=period_start
+        )
+        if bucket.update(**{field: F(field) + value for field, value in changes.items()}):
+            continue
+        try:
+            with transaction.atomic():
+                TeacherScore.objects.create(
+                    teacher_id=rating.teacher_id, period=period, period_start=period_start, **changes
+                )
+        except IntegrityError:
+            bucket.update(**{field: F(field) + value for field, value in changes.items()})
+
+
+def apply_validity_change(rating, was_valid):
+    """点赞/点踩后评分有效性发生变化时，相应地计入或移出汇总表；返回有效性是否发生变化"""
+    now_valid = is_valid(rating.likes, rating.dislikes)
+    if was_valid and not now_valid:
+        apply_rating(rating, -1)
+    elif now_valid and not was_valid:
+        apply_rating(rating, 1)
+    return was_valid != now_valid
+
+
+def apply_rating_change(previous, rating):
+    """
+    评分被修改后同步汇总表（评分编辑、后台修改）：previous 为修改前的副本，新建时为 None。
+
+    老师、等级、创建时间或有效性有变化时，先把旧值移出、再把新值计入；返回是否有变化。
+    """
+    was_valid = previous is not None and is_valid(previous.likes, previous.dislikes)
+    now_valid = is_valid(rating.likes, rating.dislikes)
+    unchanged = previous is not None and (
+        (previous.teacher_id, previous.tier, previous.created_at) == (rating.teacher_id, rating.tier, rating.created_at)
+    )
+    if was_valid == now_valid and unchanged:
+        return False
+    if was_valid:
+        apply_rating(previous, -1)
+    if now_valid:
+        apply_rating(rating, 1)
+    return True
+
+
+def remove_ratings(ratings):
+    """
+    批量删除评分前调用（如删除用户时级联删除其评分）：把其中的有效评分移出汇总表，
+    每个时间桶一条 UPDATE。返回涉及的老师 id 集合，供调用方刷新关键词。
+    """
+    rows = build_score_rows(ratings.filter(valid_rating_q()).values_list('teacher_id', 'tier', 'created_at'))
+    for row in rows:
+        TeacherScore.objects.filter(
+            teacher_id=row.teacher_id, period=row.period, period_start=row.period_start
+        ).update(**{field: F(field) - getattr(row, field) for field in ('t1', 't2', 't3', 'count', 'total_score')})
+    return {row.teacher_id for row in rows}
+
+
+def build_score_rows(ratings):
+    """
+    根据 (teacher_id, tier, created_at) 序列在内存中汇总，返回未保存的 TeacherScore 列表。
+    """
+    totals = defaultdict(lambda: {'t1': 0, 't2': 0, 't3': 0, 'count': 0, 'total_score': 0})
+    for teacher_id, tier, created_at in ratings:
+        for period, period_start in score_buckets(created_at):
+            row = totals[(teacher_id, period, period_start)]
+            row[tier.lower()] += 1
+            row['count'] += 1
+            row['total_score'] += SCORE_MAP[tier]
+    return [
+        TeacherScore(teacher_id=teacher_id, period=period, period_start=period_start, **values)
+        for (teacher_id, period, period_start), values in totals.items()
+    ]
+
+
+def rebuild_teacher_scores(teacher_ids=None, batch_size=1000):
+    """
+    从 Rating 全量重建汇总表（修复漂移、回填历史数据），返回写入的行数。
+
+    teacher_ids 为 None 时重建全部老师。
+    读取评分与替换汇总行在同一事务中进行，并先锁定这些老师现有的汇总行：
+    正在增量更新这些行的写操作提交后才读取评分，之后的增量更新等待重建提交后再执行，
+    重建期间的评分写入既不会丢失也不会重复计入。
+    """
+    ratings = Rating.objects.filter(valid_rating_q())
+    scores = TeacherScore.objects.all()
+    if teacher_ids is not None:
+        ratings = ratings.filter(teacher_id__in=teacher_ids)
+        scores = scores.filter(teacher_id__in=teacher_ids)
+
+    with transaction.atomic():
+        list(scores.select_for_update().values_list('pk', flat=True))
+        rows = build_score_rows(
+            ratings.values_list('teacher_id', 'tier', 'created_at').iterator(chunk_size=batch_size)
+        )
+        scores.delete()
+        TeacherScore.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from rest_framework import serializers
 
+from . import ranking, vote_buffer
 from .models import School, Department, Teacher, Rating, UserVote, UserInteraction
 
 
@@ -9,6 +11,14 @@ class SchoolSerializer(serializers.ModelSerializer):
         model = School
         fields = '__all__'
 
+    def validate_semester_starts(self, value):
+        """学期起始日期：YYYY-MM-DD 字符串列表，保存时去重并按日期排序"""
+        try:
+            starts = ranking.parse_semester_starts(value)
+        except ValueError:
+            raise serializers.ValidationError('学期起始日期必须是 YYYY-MM-DD 日期列表')
+        return [start.isoformat() for start in starts]
+
 
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,6 +35,25 @@ class TeacherSerializer(serializers.ModelSerializer):
         fields = ['teacher_id', 'name', 'department', 'department_name', 'school', 'school_code', 'created_at']
 
 
+class TeacherRankingSerializer(TeacherSerializer):
+    """排行榜条目：老师信息 + 统计数据（由 ranking.annotate_teacher_stats 注解）"""
+    T1 = serializers.IntegerField(source='t1', read_only=True)
+    T2 = serializers.IntegerField(source='t2', read_only=True)
+    T3 = serializers.IntegerField(source='t3', read_only=True)
+    count = serializers.IntegerField(read_only=True)
+    total_score = serializers.IntegerField(read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+    featured_comments = serializers.SerializerMethodField(read_only=True)
+
+    class Meta(TeacherSerializer.Meta):
+        fields = TeacherSerializer.Meta.fields + [
+            'T1', 'T2', 'T3', 'count', 'total_score', 'rank', 'featured_comments'
+        ]
+
+    def get_featured_comments(self, obj):
+        comments = self.context.get('featured_comments', {}).get(obj.teacher_id, [])
+        return RatingSerializer(comments, many=True).data
+
 
 
 class RatingSerializer(serializers.ModelSerializer):
@@ -44,6 +73,10 @@ class RatingSerializer(serializers.ModelSerializer):
         """返回匿名用户ID，不暴露真实用户信息"""
         return f'anon-{obj.user_id}'
 
+    def to_representation(self, instance):
+        # 点赞缓冲开启时叠加尚未写回数据库的点赞/点踩增量
+        return vote_buffer.merge_pending(super().to_representation(instance))
+
 
 class UserVoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -107,12 +140,29 @@ class SuperAdminRatingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['likes', 'dislikes', 'created_at', 'updated_at', 'user']
     
-    def get_liked_users(self, obj):
-        """获取所有点赞的用户"""
-        interactions = UserInteraction.objects.filter(
-            rating=obj, 
-            interaction_type=UserInteraction.LIKE
-        ).select_related('user')
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 精简模式：列表不带点赞/点踩用户，改由 /superadmin/{id}/voters/ 按需获取
+        if not self.context.get('include_voters', True):
+            self.fields.pop('liked_users')
+            self.fields.pop('disliked_users')
+
+    @staticmethod
+    def prefetch_voters(queryset):
+        """
+        一次查询预取整页评分的全部点赞/点踩记录（存入 rating.prefetched_interactions），
+        避免 get_liked_users / get_disliked_users 每条评分各查一次（2N+1 问题）。
+        """
+        return queryset.prefetch_related(
+            Prefetch(
+                'interactions',
+                queryset=UserInteraction.objects.select_related('user').order_by('created_at'),
+                to_attr='prefetched_interactions',
+            )
+        )
+
+    @staticmethod
+    def voter_list(interactions, interaction_type):
         return [
             {
                 'id': i.user.id,
@@ -121,23 +171,25 @@ class SuperAdminRatingSerializer(serializers.ModelSerializer):
                 'created_at': i.created_at
             }
             for i in interactions
+            if i.interaction_type == interaction_type
         ]
+
+    def _interactions(self, obj):
+        interactions = getattr(obj, 'prefetched_interactions', None)
+        if interactions is None:
+            interactions = UserInteraction.objects.filter(rating=obj).select_related('user').order_by('created_at')
+        return interactions
+
+    def get_liked_users(self, obj):
+        """获取所有点赞的用户"""
+        return self.voter_list(self._interactions(obj), UserInteraction.LIKE)
     
     def get_disliked_users(self, obj):
         """获取所有点踩的用户"""
-        interactions = UserInteraction.objects.filter(
-            rating=obj, 
-            interaction_type=UserInteraction.DISLIKE
-        ).select_related('user')
-        return [
-            {
-                'id': i.user.id,
-                'username': i.user.username,
-                'email': i.user.email,
-                'created_at': i.created_at
-            }
-            for i in interactions
-        ]
+        return self.voter_list(self._interactions(obj), UserInteraction.DISLIKE)
+
+    def to_representation(self, instance):
+        return vote_buffer.merge_pending(super().to_representation(instance))
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -0,0 +1,119 @@
+"""
+老师名单 CSV 批量导入（/api/teachers/bulk_import/）。
+
+- 逐行流式解析上传文件，不把整个文件读入内存
+- 学校、部门预加载到字典；老师按学校懒加载已有的 (部门, 姓名) 集合用于去重
+- 每 chunk_size 行用 bulk_create 批量写入，整个导入在一个事务中完成
+- 返回新增/跳过数量以及逐行错误（最多 MAX_ERRORS 条，另给出错误总数）
+"""
+import csv
+import io
+
+from django.db import transaction
+
+from .models import School, Department, Teacher
+
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 100
+
+
+class TeacherImporter:
+    def __init__(self, default_school_code=None, chunk_size=CHUNK_SIZE):
+        self.default_school_code = default_school_code
+        self.chunk_size = chunk_size
+        self.schools = set(School.objects.values_list('school_code', flat=True))
+        self.departments = dict(Department.objects.values_list('department_name', 'department_id'))
+        self.existing = {}  # school_code -> {(department_id, name)}
+        self.created = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, detail):
+        self.skipped += 1
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'detail': detail})
+
+    def run(self, stream):
+        reader = csv.DictReader(stream)
+        chunk = []
+        with transaction.atomic():
+            # 表头占第 1 行，数据从第 2 行开始
+            for line, row in enumerate(reader, start=2):
+                name = (row.get('name') or '').strip()
+                dept_name = (row.get('department') or '').strip()
+                school_code = (row.get('school_code') or '').strip() or self.default_school_code
+                if not name:
+                    self.error(line, '缺少 name')
+                elif not dept_name:
+                    self.error(line, '缺少 department')
+                elif not school_code:
+                    self.error(line, '缺少 school_code')
+                else:
+                    chunk.append((name, dept_name, school_code))
+                if len(chunk) >= self.chunk_size:
+                    self.flush(chunk)
+                    chunk = []
+            self.flush(chunk)
+        return {
+            'created': self.created,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def flush(self, chunk):
+        if not chunk:
+            return
+
+        # 不存在的学校/部门先批量创建（学校名称默认为学校代码，与原逻辑一致）
+        new_schools = {code for _, _, code in chunk if code not in self.schools}
+        if new_schools:
+            School.objects.bulk_create(
+                [School(school_code=code, school_name=code) for code in new_schools],
+                ignore_conflicts=True,
+            )
+            self.schools |= new_schools
+
+        new_departments = {dept for _, dept, _ in chunk if dept not in self.departments}
+        if new_departments:
+            Department.objects.bulk_create(
+                [Department(department_name=dept) for dept in new_departments],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts 不回填主键，重新查询新部门的 ID
+            self.departments.update(
+                Department.objects.filter(department_name__in=new_departments)
+                .values_list('department_name', 'department_id')
+            )
+
+        teachers = []
+        for name, dept_name, school_code in chunk:
+            key = (self.departments[dept_name], name)
+            existing = self.existing_for(school_code)
+            if key in existing:
+                self.skipped += 1
+                continue
+            existing.add(key)
+            teachers.append(Teacher(name=name, department_id=key[0], school_id=school_code))
+
+        Teacher.objects.bulk_create(teachers, batch_size=self.chunk_size)
+        self.created += len(teachers)
+
+    def existing_for(self, school_code):
+        if school_code not in self.existing:
+            self.existing[school_code] = set(
+                Teacher.objects.filter(school_id=school_code).values_list('department_id', 'name')
+            )
+        return self.existing[school_code]
+
+
+def import_teachers(uploaded_file, default_school_code=None, chunk_size=CHUNK_SIZE):
+    """导入上传的 CSV 文件（字段：name,department,school_code），返回导入结果统计"""
+    stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+    try:
+        return TeacherImporter(default_school_code, chunk_size).run(stream)
+    finally:
+        stream.detach()
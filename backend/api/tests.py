@@ -0,0 +1,830 @@
+import base64
+import json
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.test import APIClient
+
+from . import admin_stats, authentication, keywords, quota, ranking, scores, throttling, versions, vote_buffer
+from .models import AuthToken, Department, Rating, School, Teacher, TeacherKeywords, TeacherScore, User, UserInteraction, UserVote
+from .views import delete_user_and_ratings
+
+
+class FastListSerializerTests(TestCase):
+    """评分、老师列表的快速序列化（api/fast_serializers.py）与 ModelSerializer 渲染结果逐字节一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(school_code='S1', school_name='一中')
+        other = School.objects.create(school_code='S2', school_name='二中')
+        math = Department.objects.create(department_name='数学')
+        physics = Department.objects.create(department_name='物理')
+        teachers = [
+            Teacher.objects.create(name=f'老师{i}', department=(math, physics)[i % 2], school=school)
+            for i in range(4)
+        ]
+        Teacher.objects.create(name='外校老师', department=math, school=other)
+        Teacher.objects.create(name='无学校老师', department=physics)
+
+        cls.student = User.objects.create_user(
+            username='student', password='pw123456', school=school,
+            is_approved=True, approval_status='approved',
+        )
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+        for i in range(12):
+            Rating.objects.create(
+                teacher=teachers[i % len(teachers)], school=school, user=cls.student,
+                tier=('T1', 'T2', 'T3')[i % 3], reason=f'评价内容{i}',
+                likes=i % 4, dislikes=i % 3, is_featured=(i == 5),
+            )
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE].clear()
+
+    def render_both(self, user, path):
+        """分别开启、关闭快速序列化请求同一接口，返回两次的 (状态码, 响应字节)"""
+        client = APIClient()
+        client.force_authenticate(user)
+        results = []
+        for fast in (True, False):
+            # 老师列表有响应缓存，两次请求之间清空，保证都实际序列化
+            caches[settings.RESPONSE_CACHE].clear()
+            with override_settings(FAST_LIST_SERIALIZERS=fast):
+                response = client.get(path, HTTP_ACCEPT='application/json')
+            results.append((response.status_code, response.content))
+        return results
+
+    def assertSameOutput(self, user, path):
+        fast, slow = self.render_both(user, path)
+        self.assertEqual(fast[0], 200)
+        self.assertEqual(fast, slow)
+        return fast[1]
+
+    def test_teacher_list(self):
+        for user in (self.student, self.superuser):
+            with self.subTest(user=user.username):
+                self.assertSameOutput(user, '/api/teachers/')
+
+    def test_teacher_list_without_school(self):
+        # 没有学校的老师不输出 school_code
+        content = self.assertSameOutput(self.superuser, '/api/teachers/')
+        self.assertIn('无学校老师'.encode(), content)
+
+    def test_rating_list(self):
+        for user in (self.student, self.superuser):
+            with self.subTest(user=user.username):
+                self.assertSameOutput(user, '/api/ratings/')
+
+    def test_rating_list_cursor_pages(self):
+        path = '/api/ratings/?page_size=5'
+        pages = 0
+        while path:
+            content = self.assertSameOutput(self.student, path)
+            next_url = json.loads(content)['next']
+            path = next_url.split('testserver', 1)[1] if next_url else None
+            pages += 1
+        self.assertEqual(pages, 3)
+
+    def test_rating_list_with_pending_votes(self):
+        rating = Rating.objects.order_by('rating_id').first()
+        with override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FLUSH_INTERVAL_MS=0):
+            vote_buffer.add(rating.pk, likes=3, dislikes=1)
+            try:
+                self.assertSameOutput(self.student, '/api/ratings/')
+            finally:
+                caches[settings.VOTE_BUFFER_CACHE].clear()
+
+
+@override_settings(KEYWORDS_REFRESH_INTERVAL_MS=0)
+class ConditionalGetTests(TestCase):
+    """条件 GET 与数据版本（api/versions.py）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.other = School.objects.create(school_code='S2', school_name='二中')
+        department = Department.objects.create(department_name='数学')
+        cls.teacher = Teacher.objects.create(name='老师', department=department, school=cls.school)
+        cls.other_teacher = Teacher.objects.create(name='外校老师', department=department, school=cls.other)
+        cls.student = User.objects.create_user(
+            username='student', password='pw123456', school=cls.school,
+            is_approved=True, approval_status='approved',
+        )
+        cls.other_student = User.objects.create_user(
+            username='other', password='pw123456', school=cls.other,
+            is_approved=True, approval_status='approved',
+        )
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def etag(self, client, path='/api/ratings/'):
+        response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified(self):
+        client = self.client_for(self.student)
+        etag = self.etag(client)
+        with self.assertNumQueries(1):
+            response = client.get('/api/ratings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_bumps_only_own_school(self):
+        client = self.client_for(self.student)
+        other_client = self.client_for(self.other_student)
+        etag, other_etag, global_etag = self.etag(client), self.etag(other_client), self.etag(self.client_for(self.superuser))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/ratings/', {'teacher': self.teacher.pk, 'tier': 'T1', 'reason': '讲课很好'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(versions.current('S1')[0], 1)
+        self.assertEqual(versions.current('S2')[0], 0)
+        self.assertEqual(client.get('/api/ratings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(other_client.get('/api/ratings/', HTTP_IF_NONE_MATCH=other_etag).status_code, 304)
+        # 全站版本取各学校之和，任一学校的写操作都会使超级管理员的 ETag 失效
+        self.assertEqual(self.client_for(self.superuser).get('/api/ratings/', HTTP_IF_NONE_MATCH=global_etag).status_code, 200)
+
+    def test_failed_write_does_not_bump(self):
+        client = self.client_for(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/ratings/', {'teacher': self.other_teacher.pk, 'tier': 'T1', 'reason': '讲课很好'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(versions.current('S1')[0], 0)
+
+    def test_staff_write_bumps_all_schools(self):
+        versions.bump('S1')
+        versions.bump_all()
+        self.assertEqual(versions.current('S1')[0], 2)
+        self.assertEqual(versions.current('S2')[0], 1)
+        self.assertEqual(versions.current(versions.ALL_SCOPE)[0], 3)
+
+    def test_buffered_votes_bump_on_flush(self):
+        rating = Rating.objects.create(teacher=self.teacher, school=self.school, user=self.student, tier='T1', reason='讲课很好')
+        liker = self.client_for(User.objects.create_user(
+            username='liker', password='pw123456', school=self.school, is_approved=True, approval_status='approved',
+        ))
+        with override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FLUSH_INTERVAL_MS=0):
+            try:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = liker.post(f'/api/ratings/{rating.pk}/like/')
+                self.assertEqual(response.json()['likes'], 1)
+                self.assertEqual(versions.current('S1')[0], 0)
+                with self.captureOnCommitCallbacks(execute=True):
+                    vote_buffer.flush()
+                self.assertEqual(versions.current('S1')[0], 1)
+            finally:
+                caches[settings.VOTE_BUFFER_CACHE].clear()
+        self.assertEqual(Rating.objects.get(pk=rating.pk).likes, 1)
+
+
+@override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FLUSH_INTERVAL_MS=0, KEYWORDS_REFRESH_INTERVAL_MS=0)
+class VoteBufferTests(TestCase):
+    """点赞/点踩写后缓冲（api/vote_buffer.py）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=cls.school,
+        )
+        cls.author = User.objects.create_user(
+            username='author', password='pw123456', school=cls.school, is_approved=True, approval_status='approved',
+        )
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+
+    def setUp(self):
+        self.cache = caches[settings.VOTE_BUFFER_CACHE]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+    def create_rating(self, **kwargs):
+        rating = Rating.objects.create(
+            teacher=self.teacher, school=self.school, user=self.author, tier='T1', reason='讲课很好', **kwargs,
+        )
+        scores.apply_rating(rating, 1)
+        return rating
+
+    def test_missing_slot_skipped_after_grace(self):
+        first, second = self.create_rating(), self.create_rating()
+        vote_buffer.add(first.pk, likes=1)
+        # 写入方递增序号后没有写入槽位就退出
+        self.cache.incr(vote_buffer.SEQ_KEY)
+        vote_buffer.add(second.pk, likes=1)
+
+        self.assertEqual(vote_buffer.flush(), 1)
+        self.assertEqual(vote_buffer.flush(), 0)
+        with mock.patch.object(vote_buffer, 'SLOT_GRACE_SECONDS', 0):
+            self.assertEqual(vote_buffer.flush(), 1)
+        self.assertEqual(Rating.objects.get(pk=second.pk).likes, 1)
+
+    def test_update_flushes_pending_votes(self):
+        rating = self.create_rating()
+        vote_buffer.add(rating.pk, dislikes=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/ratings/{rating.pk}/', {'tier': 'T2'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dislikes'], 2)
+        self.assertFalse(vote_buffer.flush_rating(rating.pk))
+        # 点踩写回后评分失效，换等级时不再计入汇总表
+        self.assertFalse(TeacherScore.objects.filter(teacher=self.teacher).exclude(count=0).exists())
+
+    def test_delete_discards_pending_votes(self):
+        rating = self.create_rating()
+        vote_buffer.add(rating.pk, likes=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/ratings/{rating.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(vote_buffer.flush_rating(rating.pk))
+
+
+class AdminStatsTests(TestCase):
+    """超级管理员统计面板的缓存（api/admin_stats.py）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.department = Department.objects.create(department_name='数学')
+        cls.teacher = Teacher.objects.create(name='老师', department=cls.department, school=cls.school)
+        cls.admin = User.objects.create_user(
+            username='admin', password='pw123456', school=cls.school, is_staff=True,
+            is_approved=True, approval_status='approved',
+        )
+
+    def setUp(self):
+        admin_stats.invalidate_stats()
+        self.addCleanup(admin_stats.invalidate_stats)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_adjust_accumulates(self):
+        ratings = admin_stats.get_stats()['ratings']
+        # 缓存已由 get_stats 填充，调整后读取不再查询数据库
+        admin_stats.adjust_stats(ratings=1, ratings_today=1)
+        admin_stats.adjust_stats(ratings=1, total_likes=1)
+        with self.assertNumQueries(0):
+            stats = admin_stats.get_stats()
+        self.assertEqual(stats['ratings'], ratings + 2)
+        self.assertEqual(stats['total_likes'], 1)
+
+    def test_adjust_without_cache_is_noop(self):
+        admin_stats.adjust_stats(ratings=1)
+        self.assertEqual(admin_stats.get_stats(), admin_stats.compute_stats())
+
+    def test_teacher_writes_invalidate(self):
+        teachers = admin_stats.get_stats()['teachers']
+        response = self.client.post('/api/teachers/', {'name': '新老师', 'department': self.department.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(admin_stats.get_stats()['teachers'], teachers + 1)
+
+        response = self.client.post('/api/teachers/create_one/', {'name': '另一位', 'department_name': '数学'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(admin_stats.get_stats()['teachers'], teachers + 2)
+
+        upload = SimpleUploadedFile('teachers.csv', 'name,department,school_code\n导入老师,物理,S1\n'.encode())
+        response = self.client.post('/api/teachers/bulk_import/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(admin_stats.get_stats()['teachers'], teachers + 3)
+
+        self.assertEqual(self.client.delete(f'/api/teachers/{self.teacher.pk}/').status_code, 204)
+        self.assertEqual(admin_stats.get_stats()['teachers'], teachers + 2)
+
+
+class TokenAuthenticationTests(TestCase):
+    """带过期时间、缓存的 Token 认证（api/authentication.py）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='student', password='pw123456')
+
+    def setUp(self):
+        caches[settings.AUTH_TOKEN_CACHE].clear()
+        self.addCleanup(caches[settings.AUTH_TOKEN_CACHE].clear)
+        self.key = authentication.issue_token(self.user)
+        self.auth = authentication.CachedTokenAuthentication()
+
+    def authenticate(self):
+        return self.auth.authenticate_credentials(self.key)[0]
+
+    def test_cache_hit_skips_database(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    def test_expired_token(self):
+        AuthToken.objects.filter(key=self.key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+    def test_cached_token_expires(self):
+        self.authenticate()
+        # 缓存中的过期时间已过时重新查库
+        with mock.patch.object(timezone, 'now', return_value=timezone.now() + authentication.token_lifetime()):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate()
+
+    def test_sliding_renewal(self):
+        lifetime = authentication.token_lifetime()
+        AuthToken.objects.filter(key=self.key).update(expires_at=timezone.now() + lifetime / 4)
+        self.authenticate()
+        expires_at = AuthToken.objects.get(key=self.key).expires_at
+        self.assertGreater(expires_at, timezone.now() + lifetime * 0.9)
+        # 续期后的过期时间写回缓存，之后的请求既不查库也不再续期
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_invalidate_user(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            authentication.invalidate_user(self.user.pk)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+    def test_clear_token_cache(self):
+        self.authenticate()
+        authentication.clear_token_cache()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_deleted_user(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_user_and_ratings(self.user)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+
+@override_settings(KEYWORDS_REFRESH_INTERVAL_MS=0)
+class TeacherScoreTests(TestCase):
+    """TeacherScore 汇总表随评分增删改、有效性变化增量维护（api/scores.py），结果与全量重建一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=cls.school,
+        )
+        cls.author, cls.voter = [
+            User.objects.create_user(
+                username=name, password='pw123456', school=cls.school, is_approved=True, approval_status='approved',
+            )
+            for name in ('author', 'voter')
+        ]
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def buckets(self):
+        """非空时间桶：{period: (t1, t2, t3, count, total_score)}"""
+        return {
+            period: values
+            for period, *values in TeacherScore.objects.filter(teacher=self.teacher, count__gt=0)
+            .values_list('period', 't1', 't2', 't3', 'count', 'total_score')
+        }
+
+    def assertBuckets(self, t1=0, t2=0, t3=0):
+        count = t1 + t2 + t3
+        expected = {}
+        if count:
+            total = t1 * ranking.SCORE_MAP['T1'] + t2 * ranking.SCORE_MAP['T2'] + t3 * ranking.SCORE_MAP['T3']
+            expected = {period: [t1, t2, t3, count, total] for period, _ in TeacherScore.PERIOD_CHOICES}
+        self.assertEqual(self.buckets(), expected)
+        # 增量维护的结果与全量重建相同
+        scores.rebuild_teacher_scores([self.teacher.pk])
+        self.assertEqual(self.buckets(), expected)
+
+    def test_rating_lifecycle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.author).post(
+                '/api/ratings/', {'teacher': self.teacher.pk, 'tier': 'T1', 'reason': '讲课很好'}, format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+        rating_id = response.json()['rating_id']
+        self.assertBuckets(t1=1)
+
+        admin = self.client_for(self.superuser)
+        self.assertEqual(admin.patch(f'/api/ratings/{rating_id}/', {'tier': 'T3'}, format='json').status_code, 200)
+        self.assertBuckets(t3=1)
+
+        # 踩多于赞时失效并移出汇总表，取消点踩后重新计入
+        voter = self.client_for(self.voter)
+        self.assertEqual(voter.post(f'/api/ratings/{rating_id}/dislike/').status_code, 200)
+        self.assertBuckets()
+        self.assertEqual(voter.post(f'/api/ratings/{rating_id}/dislike/').status_code, 200)
+        self.assertBuckets(t3=1)
+
+        self.assertEqual(admin.delete(f'/api/ratings/{rating_id}/').status_code, 204)
+        self.assertBuckets()
+
+    def test_invalid_rating_edit_not_counted(self):
+        rating = Rating.objects.create(
+            teacher=self.teacher, school=self.school, user=self.author, tier='T2', reason='讲课很好', dislikes=1,
+        )
+        response = self.client_for(self.superuser).patch(f'/api/ratings/{rating.pk}/', {'tier': 'T1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertBuckets()
+
+
+class VoteToggleTests(TestCase):
+    """点赞/点踩切换（RatingViewSet.like / dislike）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=cls.school,
+        )
+        cls.users = [
+            User.objects.create_user(
+                username=f'u{i}', password='pw123456', school=cls.school, is_approved=True, approval_status='approved',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.rating = Rating.objects.create(
+            teacher=self.teacher, school=self.school, user=self.users[0], tier='T1', reason='讲课很好',
+        )
+        scores.apply_rating(self.rating, 1)
+
+    def vote(self, user, kind):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(f'/api/ratings/{self.rating.pk}/{kind}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def counted(self):
+        return TeacherScore.objects.filter(teacher=self.teacher, period=TeacherScore.PERIOD_DAY).get().count
+
+    def test_toggle(self):
+        user = self.users[1]
+        steps = (
+            ('like', 1, 0, UserInteraction.LIKE),
+            ('dislike', 0, 1, UserInteraction.DISLIKE),
+            ('dislike', 0, 0, None),
+        )
+        for kind, likes, dislikes, interaction in steps:
+            with self.subTest(kind=kind):
+                data = self.vote(user, kind)
+                self.assertEqual(
+                    (data['likes'], data['dislikes'], data['interaction']), (likes, dislikes, interaction),
+                )
+                self.rating.refresh_from_db()
+                self.assertEqual((self.rating.likes, self.rating.dislikes), (likes, dislikes))
+        self.assertFalse(UserInteraction.objects.filter(rating=self.rating).exists())
+
+    def test_validity_boundary(self):
+        self.vote(self.users[1], 'like')
+        # 赞踩相等仍然有效
+        self.vote(self.users[2], 'dislike')
+        self.assertEqual(self.counted(), 1)
+        # 取消点赞后踩多于赞，移出汇总表；重新点赞后再计入
+        self.vote(self.users[1], 'like')
+        self.assertEqual(self.counted(), 0)
+        self.vote(self.users[1], 'like')
+        self.assertEqual(self.counted(), 1)
+
+    def test_unknown_rating(self):
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        self.assertEqual(client.post('/api/ratings/999999/like/').status_code, 404)
+        self.assertFalse(UserInteraction.objects.filter(user=self.users[1]).exists())
+
+
+class DailyQuotaTests(TransactionTestCase):
+    """每日等级额度（api/quota.py）：并发占用额度也不会超过学校的限额"""
+
+    def setUp(self):
+        school = School.objects.create(school_code='S1', school_name='一中', daily_t1_limit=3)
+        self.user = User.objects.create_user(
+            username='student', password='pw123456', school=school, is_approved=True, approval_status='approved',
+        )
+
+    def reserve_concurrently(self, attempts):
+        today = timezone.localdate()
+        barrier = threading.Barrier(attempts)
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                # SQLite 的内存测试库（共享缓存）遇到表锁时立即报错而不等待，重试直到得出结果
+                for _ in range(500):
+                    try:
+                        with transaction.atomic():
+                            results.append(quota.reserve(self.user, 'T1', today))
+                        break
+                    except OperationalError:
+                        time.sleep(0.01)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_reserve_within_limit(self):
+        results = self.reserve_concurrently(8)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results.count(True), 3)
+        self.assertEqual(quota.used_today(self.user)['T1'], 3)
+
+    def test_existing_votes_count_towards_limit(self):
+        department = Department.objects.create(department_name='数学')
+        for i in range(2):
+            UserVote.objects.create(
+                user=self.user, vote_date=timezone.localdate(), tier='T1',
+                teacher=Teacher.objects.create(name=f'老师{i}', department=department, school=self.user.school),
+            )
+        # 当天还没有计数行时按已有的 UserVote 初始化
+        self.assertEqual(self.reserve_concurrently(4).count(True), 1)
+        self.assertEqual(quota.get_quota(self.user)['T1'], {'limit': 3, 'used': 3, 'remaining': 0})
+
+
+class ThrottleTests(TestCase):
+    """登录、注册限流（api/throttling.py）"""
+
+    RATES = {'login_ip': '5/min', 'login_identifier': '3/min', 'signup_ip': '2/hour'}
+
+    def setUp(self):
+        # 与部署时相同的文件缓存，放在临时目录中
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache = FileBasedCache(directory, {})
+        for name, value in (('cache', self.cache), ('THROTTLE_RATES', self.RATES)):
+            patcher = mock.patch.object(throttling.SlidingWindowThrottle, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def login(self, username, ip):
+        return APIClient().post(
+            '/api/login-user/', {'username': username, 'password': 'wrong'}, format='json', REMOTE_ADDR=ip,
+        )
+
+    def test_login_identifier(self):
+        statuses = [self.login('student', f'10.0.0.{i}').status_code for i in range(3)]
+        self.assertNotIn(429, statuses)
+        # 换 IP、换大小写仍按同一账号计数
+        response = self.login('STUDENT', '10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response['Retry-After'])
+
+    def test_login_ip(self):
+        statuses = [self.login(f'user{i}', '10.0.0.1').status_code for i in range(6)]
+        self.assertNotIn(429, statuses[:5])
+        self.assertEqual(statuses[5], 429)
+        self.assertNotEqual(self.login('user9', '10.0.0.2').status_code, 429)
+
+    def test_signup_ip(self):
+        statuses = [APIClient().post('/api/signup/', {}, format='json', REMOTE_ADDR='10.0.0.1').status_code for _ in range(3)]
+        self.assertEqual(statuses[2], 429)
+
+    def test_shared_across_workers(self):
+        """限流记录在各工作进程间共享：依次在两个子进程中请求，总放行次数不超过速率"""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        for _ in range(2):
+            process = context.Process(target=_throttle_worker, args=(self.cache, results, 4))
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        allowed = [results.get(timeout=5) for _ in range(2)]
+        self.assertEqual(allowed, [4, 1])
+
+
+def _throttle_worker(cache, results, attempts):
+    """子进程（模拟另一个工作进程）中按同一 IP 检查 attempts 次登录限流，返回放行次数"""
+    request = RequestFactory().post('/api/login-user/', REMOTE_ADDR='10.0.0.1')
+    with mock.patch.object(throttling.SlidingWindowThrottle, 'cache', cache), \
+            mock.patch.object(throttling.SlidingWindowThrottle, 'THROTTLE_RATES', ThrottleTests.RATES):
+        results.put(sum(throttling.LoginIPThrottle().allow_request(request, None) for _ in range(attempts)))
+
+
+class CursorPaginationTests(TestCase):
+    """列表接口的游标分页（api/pagination.py）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(school_code='S1', school_name='一中')
+        teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=school,
+        )
+        cls.student = User.objects.create_user(
+            username='student', password='pw123456', school=school, is_approved=True, approval_status='approved',
+        )
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+        for i in range(7):
+            Rating.objects.create(teacher=teacher, school=school, user=cls.student, tier='T1', reason=f'评价{i}')
+        # 创建时间相同时按 rating_id 排序，翻页不重复也不遗漏
+        Rating.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+    def collect(self, path, key):
+        ids = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row[key] for row in response.json()['results'])
+            next_url = response.json()['next']
+            path = next_url.split('testserver', 1)[1] if next_url else None
+        return ids
+
+    def test_rating_pages(self):
+        expected = list(Rating.objects.order_by('-rating_id').values_list('rating_id', flat=True))
+        self.assertEqual(self.collect('/api/ratings/?page_size=3', 'rating_id'), expected)
+
+    def test_user_pages(self):
+        expected = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self.collect('/api/superadmin/all_users/?page_size=1', 'id'), expected)
+
+    def test_unpaginated_without_params(self):
+        response = self.client.get('/api/ratings/')
+        self.assertEqual(len(response.json()), 7)
+
+    def test_invalid_page_size_uses_default(self):
+        response = self.client.get('/api/ratings/?page_size=abc')
+        self.assertEqual(len(response.json()['results']), 7)
+        self.assertIsNone(response.json()['next'])
+
+    def test_bad_cursor(self):
+        def encode(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ('!!!', encode({'a': 1}), encode([1]), encode(['不是时间', 1])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/ratings/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()['detail'], '无效的 cursor')
+
+
+class SuperAdminVotersTests(TestCase):
+    """超级管理员查看评分的点赞/点踩用户"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(school_code='S1', school_name='一中')
+        teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=school,
+        )
+        cls.author = User.objects.create_user(username='author', password='pw123456', school=school)
+        cls.fan = User.objects.create_user(username='fan', password='pw123456', school=school, real_name='粉丝')
+        cls.rating = Rating.objects.create(teacher=teacher, school=school, user=cls.author, tier='T1', reason='讲课很好')
+        UserInteraction.objects.create(user=cls.fan, rating=cls.rating, interaction_type=UserInteraction.LIKE)
+        cls.superuser = User.objects.create_superuser(username='root', email='root@example.com', password='pw123456')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+    def test_voters(self):
+        response = self.client.get(f'/api/superadmin/{self.rating.pk}/voters/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rating_id'], self.rating.pk)
+        self.assertEqual(len(response.json()['liked_users']), 1)
+        self.assertEqual(response.json()['disliked_users'], [])
+
+    def test_unknown_or_invalid_rating(self):
+        for pk in ('999999', 'abc'):
+            with self.subTest(pk=pk):
+                self.assertEqual(self.client.get(f'/api/superadmin/{pk}/voters/').status_code, 404)
+
+
+@override_settings(KEYWORDS_REFRESH_INTERVAL_MS=0)
+class KeywordRefreshTests(TestCase):
+    """评分写入只标记老师待重算，关键词在请求之外合并重算（api/keywords.py）"""
+
+    REASONS = ('板书清晰工整，作业布置很多', '讲课生动有趣，板书清晰工整')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(school_code='S1', school_name='一中')
+        cls.teacher = Teacher.objects.create(
+            name='老师', department=Department.objects.create(department_name='数学'), school=cls.school,
+        )
+        cls.users = [
+            User.objects.create_user(
+                username=f'u{i}', password='pw123456', school=cls.school,
+                is_approved=True, approval_status='approved',
+            )
+            for i in range(4)
+        ]
+
+    def rate(self, user, reason):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/ratings/', {'teacher': self.teacher.pk, 'tier': 'T2', 'reason': reason}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def expected(self):
+        return keywords.extract_keywords(
+            Rating.objects.filter(teacher=self.teacher).values_list('reason', 'tier', 'likes', 'dislikes')
+        )
+
+    def test_write_marks_dirty_without_recomputing(self):
+        for i, user in enumerate(self.users):
+            self.rate(user, self.REASONS[i % 2])
+        row = TeacherKeywords.objects.get(teacher=self.teacher)
+        self.assertIsNotNone(row.dirty_at)
+        self.assertEqual(row.keywords, [])
+
+        # 多次写入合并为一次重算
+        self.assertEqual(keywords.refresh_dirty(), 1)
+        row.refresh_from_db()
+        self.assertIsNone(row.dirty_at)
+        self.assertEqual(row.keywords, self.expected())
+        self.assertTrue(row.keywords)
+        self.assertEqual(keywords.refresh_dirty(), 0)
+
+    def test_read_miss_marks_dirty(self):
+        Rating.objects.create(teacher=self.teacher, school=self.school, user=self.users[0], tier='T1', reason=self.REASONS[0])
+        self.assertEqual(keywords.get_teacher_keywords(self.teacher.pk), [])
+        self.assertTrue(TeacherKeywords.objects.filter(teacher=self.teacher, dirty_at__isnull=False).exists())
+        keywords.refresh_dirty()
+        self.assertEqual(keywords.get_teacher_keywords(self.teacher.pk), self.expected())
+
+    def test_stale_result_is_not_written(self):
+        for i, user in enumerate(self.users[:2]):
+            self.rate(user, self.REASONS[i])
+        # 另一个进程在本次重算进行中重新认领：本次的结果不写回，也不清除新的待重算标记
+        original = keywords.compute_teacher_keywords
+
+        def compute_with_reclaim(teacher_id):
+            result = original(teacher_id)
+            keywords.mark_dirty(teacher_id)
+            TeacherKeywords.objects.filter(teacher_id=teacher_id).update(claimed_at=timezone.now())
+            return ['过期结果']
+
+        keywords.compute_teacher_keywords = compute_with_reclaim
+        try:
+            keywords.refresh_teacher_keywords(self.teacher.pk)
+        finally:
+            keywords.compute_teacher_keywords = original
+        row = TeacherKeywords.objects.get(teacher=self.teacher)
+        self.assertNotEqual(row.keywords, ['过期结果'])
+        self.assertIsNotNone(row.dirty_at)
+
+
+class LeaderboardTopRatingsTests(TestCase):
+    """排行榜的精选评论：窗口函数与 Django 3.2 的关联子查询两种实现结果相同"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(school_code='S1', school_name='一中')
+        department = Department.objects.create(department_name='数学')
+        cls.teachers = [Teacher.objects.create(name=f'老师{i}', department=department, school=school) for i in range(3)]
+        user = User.objects.create_user(username='u', password='pw123456', school=school)
+        for i in range(15):
+            Rating.objects.create(
+                teacher=cls.teachers[i % 3], school=school, user=user, tier='T1', reason=f'评价{i}',
+                likes=i % 4, dislikes=5 if i == 7 else 0, is_featured=(i == 13),
+            )
+
+    def top(self):
+        grouped = ranking.top_ratings_for_teachers(Rating.objects.all(), [t.pk for t in self.teachers])
+        return {teacher_id: [rating.pk for rating in ratings] for teacher_id, ratings in grouped.items()}
+
+    def test_window_and_subquery_agree(self):
+        window = self.top()
+        with mock.patch.object(ranking, 'WINDOW_FILTER_SUPPORTED', False):
+            subquery = self.top()
+        self.assertEqual(window, subquery)
+
+        # 神评置顶；失效评分（踩多于赞）不出现；每位老师最多 3 条
+        featured = Rating.objects.get(is_featured=True)
+        self.assertEqual(subquery[featured.teacher_id][0], featured.pk)
+        invalid = Rating.objects.get(dislikes=5).pk
+        for ids in subquery.values():
+            self.assertLessEqual(len(ids), 3)
+            self.assertNotIn(invalid, ids)
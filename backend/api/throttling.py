@@ -0,0 +1,106 @@
+"""
+登录、注册接口的限流（滑动窗口）。
+
+基于 DRF 的 SimpleRateThrottle：每个 key 在缓存中保存窗口内的请求时间戳列表，
+超过速率时返回 429，并在 Retry-After 中给出需要等待的秒数。
+限流在视图执行前检查，被拦截的请求不会进入密码校验。
+
+- login_ip：按客户端 IP 限制所有登录接口
+- login_identifier：按登录的用户名/邮箱限制（不区分大小写），防止对单个账号的分布式撞库
+- signup_ip：按客户端 IP 限制注册
+
+速率在 REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] 中配置；时间戳存放在 Django cache 的
+THROTTLE_CACHE 别名下，各工作进程共享（Redis 或本机文件缓存，见 settings）。
+客户端 IP 取自连接地址，只有设置了 API_NUM_PROXIES 时才从 X-Forwarded-For 中取代理前的地址。
+每个进程的放行/拦截次数记录在 counters 中，可通过 /api/superadmin/throttle_stats/ 查看。
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleCounters:
+    """线程安全的限流计数：scope -> {'allowed': n, 'throttled': n}"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.since = timezone.now()
+
+    def record(self, scope, allowed):
+        with self._lock:
+            counts = self._counts.setdefault(scope, {'allowed': 0, 'throttled': 0})
+            counts['allowed' if allowed else 'throttled'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.since.isoformat(),
+                'scopes': {scope: dict(counts) for scope, counts in self._counts.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self.since = timezone.now()
+
+
+counters = ThrottleCounters()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """在 SimpleRateThrottle 的基础上使用独立的缓存别名，并记录放行/拦截次数"""
+    cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def allow_request(self, request, view):
+        allowed = super().allow_request(request, view)
+        # 未配置速率或无法确定 key 时不计数
+        if getattr(self, 'key', None) is not None:
+            counters.record(self.scope, allowed)
+            if not allowed:
+                # 日志中不记录 key（含 IP 或账号摘要），只记录限流类型和路径
+                logger.warning(
+                    '请求被限流 scope=%s path=%s', self.scope, request.path,
+                    extra={'throttle_scope': self.scope, 'path': request.path},
+                )
+        return allowed
+
+    def cache_key_for(self, ident):
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_key_for(self.get_ident(request))
+
+
+class LoginIdentifierThrottle(SlidingWindowThrottle):
+    scope = 'login_identifier'
+
+    def get_cache_key(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        identifier = str(data.get('username') or data.get('email') or '').strip().lower()
+        if not identifier:
+            return None
+        # 用户输入可能很长或含特殊字符，取摘要作为缓存 key
+        return self.cache_key_for(hashlib.sha256(identifier.encode()).hexdigest())
+
+
+class SignupIPThrottle(SlidingWindowThrottle):
+    scope = 'signup_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_key_for(self.get_ident(request))
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginIdentifierThrottle]
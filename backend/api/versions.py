@@ -0,0 +1,156 @@
+"""
+读接口的条件 GET（ETag / Last-Modified）。
+
+前端每次打开页面都会请求老师、评分、学校列表和今日额度，大多数时候数据并没有变化。
+
+- 数据版本：DataVersion 按学校（scope 为学校代码）各记录一个递增的版本号。
+  使用 ConditionalGetMixin 的视图集上写请求成功后递增版本：有学校的普通用户只递增本校一行，
+  管理员、超级管理员和没有学校的用户的写操作递增所有学校。Django admin 和维护命令同样递增全部版本。
+  全站（'*'，超级管理员可见范围）没有单独的计数行，取所有学校版本号之和：任一学校递增都会改变总和，
+  学生的写操作不会去锁同一行全站计数
+- 版本号在写操作提交之后（transaction.on_commit）用一条独立的短 UPDATE 递增，不放进写请求的事务，
+  同校的写请求不会在版本行上排队；缓冲模式下的点赞/点踩不逐次递增，由 vote_buffer 写回时按学校合并递增
+- 读请求：在认证、权限检查之后、查询集执行之前读取当前用户可见范围的版本（一条主键查询），
+  由版本号、用户、本地日期和完整路径计算 ETag；与 If-None-Match 匹配时直接返回 304，不查询也不序列化。
+  Last-Modified 取版本更新时间（不早于当天零点，按日期统计的接口跨天后失效）
+- 响应带 Cache-Control: private, no-cache，浏览器缓存响应但每次都带上 If-None-Match 重新验证
+"""
+import hashlib
+from datetime import datetime
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import permissions
+
+from .models import DataVersion, School
+
+
+ALL_SCOPE = '*'
+
+
+def _increment(qs):
+    return qs.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def bump(school_id):
+    """递增某个学校的版本号（学校为空时递增所有学校）"""
+    if not school_id:
+        bump_all()
+        return
+    if not _increment(DataVersion.objects.filter(scope=school_id)):
+        # 首次写入时补建计数行，再递增一次，保证版本号一定变化
+        DataVersion.objects.bulk_create([DataVersion(scope=school_id)], ignore_conflicts=True)
+        _increment(DataVersion.objects.filter(scope=school_id))
+
+
+def bump_all():
+    """递增所有学校的版本号，尚未建行的学校补建计数行"""
+    _increment(DataVersion.objects.exclude(scope=ALL_SCOPE))
+    missing = School.objects.exclude(school_code__in=DataVersion.objects.values('scope'))
+    DataVersion.objects.bulk_create(
+        [DataVersion(scope=scope, version=1) for scope in missing.values_list('school_code', flat=True)],
+        ignore_conflicts=True,
+    )
+
+
+def bump_for_user(user):
+    """按写操作的发起者递增版本（规则见模块说明）"""
+    school_id = getattr(user, 'school_id', None)
+    if school_id and not user.is_staff and not user.is_superuser:
+        bump(school_id)
+    else:
+        bump_all()
+
+
+def scope_for_user(user):
+    """用户可见数据对应的版本范围：有学校的用户只能看到本校数据"""
+    if user.is_superuser or not getattr(user, 'school_id', None):
+        return ALL_SCOPE
+    return user.school_id
+
+
+def current(scope):
+    """返回 (version, updated_at)，还没有写入过的范围为 (0, None)；全站为各学校版本号之和"""
+    if scope == ALL_SCOPE:
+        row = DataVersion.objects.exclude(scope=ALL_SCOPE).aggregate(version=Sum('version'), updated_at=Max('updated_at'))
+        return row['version'] or 0, row['updated_at']
+    row = DataVersion.objects.filter(scope=scope).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def request_version(request):
+    """当前请求可见范围的 (scope, version, updated_at)，同一请求只查询一次（响应缓存也使用）"""
+    data_version = getattr(request, '_data_version', None)
+    if data_version is None:
+        scope = scope_for_user(request.user)
+        data_version = request._data_version = (scope, *current(scope))
+    return data_version
+
+
+def validators(request):
+    """计算当前请求的 (etag, last_modified)，last_modified 为时间戳"""
+    scope, version, updated_at = request_version(request)
+    today = timezone.localdate()
+    source = '|'.join([
+        scope, str(version), str(request.user.pk), today.isoformat(),
+        request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+    ])
+    etag = '"%s"' % hashlib.sha256(source.encode()).hexdigest()[:32]
+
+    midnight = timezone.make_aware(datetime(today.year, today.month, today.day))
+    last_modified = max(updated_at, midnight) if updated_at else midnight
+    return etag, int(last_modified.timestamp())
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    视图集混入：conditional_actions 中的读接口支持 If-None-Match / If-Modified-Since，
+    写请求成功后递增数据版本。需放在 ReplicaReadMixin 之前，使版本号与数据从同一个库读取。
+    """
+    conditional_actions = ()
+
+    # 写操作自行安排版本递增时（如点赞缓冲由写回统一递增）设为 True，本次请求不再递增
+    defer_version_bump = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method in permissions.SAFE_METHODS and self.action in self.conditional_actions:
+            self._validators = validators(request)
+            # 条件不满足时 get_conditional_response 原样返回传入的响应；否则返回带相同校验头的 304
+            placeholder = self._with_validators(HttpResponse())
+            response = get_conditional_response(request, *self._validators, response=placeholder)
+            if response is not placeholder:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def _with_validators(self, response):
+        etag, last_modified = self._validators
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, '_validators', None) and response.status_code == 200:
+            self._with_validators(response)
+        elif request.method not in permissions.SAFE_METHODS and response.status_code < 400 \
+                and not self.defer_version_bump:
+            # 在写操作的事务提交后递增（视图内的 atomic 块已结束时立即执行），版本行只被一条短 UPDATE 锁住
+            transaction.on_commit(partial(bump_for_user, request.user))
+        return super().finalize_response(request, response, *args, **kwargs)
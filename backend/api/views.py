@@ -1,14 +1,31 @@
-from django.contrib.auth import get_user_model, authenticate
+import copy
+import csv
+
+from django.contrib.auth import get_user_model
 from rest_framework import viewsets, permissions, status, mixins
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.viewsets import GenericViewSet
 
+from . import admin_stats, authentication, backends, keywords, passwords, quota, ranking, scores, teacher_import, throttling, vote_buffer
+from .db_router import ReplicaReadMixin
+from .fast_serializers import RatingValuesSerializer, TeacherValuesSerializer, ValuesListMixin
+from .response_cache import ResponseCacheMixin
+from .versions import ConditionalGetMixin
 from .models import School, Department, Teacher, Rating, UserVote, UserInteraction
+from .pagination import (
+    LeaderboardPagination,
+    PrimaryKeyCursorPagination,
+    RatingCursorPagination,
+    TeacherRatingCursorPagination,
+)
 from .serializers import (
     SchoolSerializer,
     DepartmentSerializer,
     TeacherSerializer,
+    TeacherRankingSerializer,
     RatingSerializer,
     UserVoteSerializer,
     UserInteractionSerializer,
@@ -17,24 +34,48 @@ from .serializers import (
     SuperAdminRatingSerializer,
     SuperAdminUserSerializer,
 )
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
-from rest_framework.exceptions import ValidationError
-from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import NotFound, ValidationError
 
 
 User = get_user_model()
 
 
-class SchoolViewSet(viewsets.ModelViewSet):
+def delete_user_and_ratings(user):
+    """删除用户：其评分随之级联删除，先把这些评分移出 TeacherScore 并刷新相关老师的关键词"""
+    with transaction.atomic():
+        for teacher_id in scores.remove_ratings(Rating.objects.filter(user=user)):
+            keywords.schedule_refresh(teacher_id)
+        # 令牌随用户级联删除，须在删除前取出需要失效的缓存
+        authentication.invalidate_user(user.pk)
+        user.delete()
+
+
+class SchoolViewSet(ResponseCacheMixin, ConditionalGetMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = School.objects.all()
     serializer_class = SchoolSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # 支持 If-None-Match 条件请求的读接口（见 api/versions.py）
+    conditional_actions = ('list', 'retrieve')
+    # 列表对同一学校的所有用户相同，缓存渲染后的 JSON（见 api/response_cache.py）
+    cached_actions = ('list',)
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.IsAuthenticated()]
         return [permissions.IsAdminUser()]
 
+    def perform_create(self, serializer):
+        serializer.save()
+        admin_stats.invalidate_stats()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        admin_stats.invalidate_stats()
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def set_daily_limit(self, request, pk=None):
         school = self.get_object()
@@ -101,10 +142,12 @@ class SchoolViewSet(viewsets.ModelViewSet):
             return Response({'detail': '请至少提供一个限制参数'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_actions = ('list', 'retrieve')
+    cached_actions = ('list',)
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
@@ -112,10 +155,13 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         return [permissions.IsAdminUser()]
 
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(ResponseCacheMixin, ConditionalGetMixin, ReplicaReadMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.select_related('department').all()
     serializer_class = TeacherSerializer
+    values_serializer_class = TeacherValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'leaderboard', 'teacher_detail', 'ratings')
+    cached_actions = ('list',)
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
@@ -126,6 +172,17 @@ class TeacherViewSet(viewsets.ModelViewSet):
         # 默认绑定管理员所在学校
         school = serializer.validated_data.get('school') or getattr(self.request.user, 'school', None)
         serializer.save(school=school)
+        admin_stats.invalidate_stats()
+
+    def perform_destroy(self, instance):
+        # 删除老师会级联删除其评分
+        instance.delete()
+        admin_stats.invalidate_stats()
+
+    def perform_update(self, serializer):
+        teacher = serializer.save()
+        # 老师换了学校时，同步其评分上冗余的学校字段
+        Rating.objects.filter(teacher=teacher).exclude(school_id=teacher.school_id).update(school_id=teacher.school_id)
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def create_one(self, request):
@@ -148,6 +205,8 @@ class TeacherViewSet(viewsets.ModelViewSet):
 
         dept, _ = Department.objects.get_or_create(department_name=dept_name)
         teacher, created = Teacher.objects.get_or_create(name=name, department=dept, school=school)
+        if created:
+            admin_stats.invalidate_stats()
         ser = self.get_serializer(teacher)
         return Response(ser.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
@@ -158,40 +217,204 @@ class TeacherViewSet(viewsets.ModelViewSet):
             return qs
         return qs.filter(school=user.school)
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated],
+            pagination_class=LeaderboardPagination)
+    def leaderboard(self, request):
+        """
+        老师排行榜（服务端聚合），替代前端 ranking.getRanking。
+
+        GET /api/teachers/leaderboard/?range=today|month|semester|year|all&school=&search=&page=&page_size=
+
+        每个条目包含 T1/T2/T3 次数、有效评分数 count、加权总分 total_score（5/10/15）、
+        全局名次 rank 以及最多 3 条精选评论。踩多于赞的评分不计入统计。
+        """
+        time_range = request.query_params.get('range', 'all')
+        if time_range not in ranking.TIME_RANGES:
+            return Response(
+                {'detail': f'range 必须为 {"/".join(ranking.TIME_RANGES)} 之一'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        qs = self.get_queryset().select_related('school')
+        school_code = (request.query_params.get('school') or '').strip()
+        if school_code:
+            qs = qs.filter(school_id=school_code)
+            school = School.objects.filter(school_code=school_code).first()
+        else:
+            school = None if request.user.is_superuser else getattr(request.user, 'school', None)
+        # 单校排行榜按该校配置的学期起始日期计算 semester，全站排行榜按默认学期划分
+        since = ranking.range_start(time_range, school=school)
+        qs = ranking.annotate_teacher_stats(qs, time_range, school=school).order_by(*ranking.LEADERBOARD_ORDERING)
+
+        search = (request.query_params.get('search') or '').strip()
+        if search:
+            # 名次以全校排名为准：先取完整排序，再按姓名过滤
+            ranks = {
+                teacher_id: index + 1
+                for index, teacher_id in enumerate(qs.values_list('teacher_id', flat=True))
+            }
+            qs = qs.filter(name__icontains=search)
+
+        page = self.paginate_queryset(qs)
+        teachers = page if page is not None else list(qs)
+        offset = 0
+        if page is not None:
+            offset = (self.paginator.page.number - 1) * self.paginator.page.paginator.per_page
+        for index, teacher in enumerate(teachers):
+            teacher.rank = ranks[teacher.teacher_id] if search else offset + index + 1
+
+        featured = ranking.top_ratings_for_teachers(
+            Rating.objects.select_related('teacher'), [t.teacher_id for t in teachers], since
+        )
+        serializer = TeacherRankingSerializer(
+            teachers, many=True, context={'request': request, 'featured_comments': featured}
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def _teacher_ratings_page(self, request, teacher_id):
+        """老师评分第一页/后续页：神评置顶、时间倒序，游标分页"""
+        paginator = TeacherRatingCursorPagination()
+        paginator.base_url = reverse('teacher-ratings', args=[teacher_id], request=request)
+        ratings = Rating.objects.select_related('teacher').filter(teacher_id=teacher_id)
+        page = paginator.paginate_queryset(ratings, request, view=self)
+        return paginator.get_paginated_response(RatingSerializer(page, many=True).data).data
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated],
+            url_path='detail', url_name='detail')
+    def teacher_detail(self, request, pk=None):
+        """
+        老师详情页一次返回：老师信息、Tier 统计与加权总分、本校排名、评分第一页。
+
+        统计读 TeacherScore 汇总表，评分走 (teacher, is_featured, created_at) 索引，
+        无论老师有多少评分，都是固定几条查询。后续评分页见 /teachers/{id}/ratings/?cursor=
+        """
+        # 与 retrieve 一致按 get_queryset() 限定本校老师，其他学校的老师返回 404
+        try:
+            teacher = ranking.annotate_teacher_stats(
+                self.get_queryset().select_related('department', 'school').filter(pk=pk)
+            ).first()
+        except (TypeError, ValueError):
+            teacher = None
+        if teacher is None:
+            raise NotFound('老师不存在')
+
+        rank, school_total = ranking.school_rank(teacher)
+        return Response({
+            'teacher': TeacherSerializer(teacher).data,
+            'stats': {
+                'T1': teacher.t1,
+                'T2': teacher.t2,
+                'T3': teacher.t3,
+                'count': teacher.count,
+                'total_score': teacher.total_score,
+                'rank': rank,
+                'school_teacher_count': school_total,
+            },
+            'ratings': self._teacher_ratings_page(request, teacher.teacher_id),
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def ratings(self, request, pk=None):
+        """老师的评分列表（游标分页，神评置顶），用于详情页“加载更多”"""
+        teacher = self.get_object()
+        return Response(self._teacher_ratings_page(request, teacher.teacher_id))
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def keywords(self, request, pk=None):
+        """
+        老师评论关键词（标签云），由服务端根据有效评分计算并持久化，
+        前端不再下载全部评论在浏览器中分词。
+        """
+        teacher = self.get_object()
+        return Response({
+            'teacher_id': teacher.teacher_id,
+            'keywords': keywords.get_teacher_keywords(teacher.teacher_id),
+        })
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def bulk_import(self, request):
         """
         通过简易 CSV 导入老师，字段：name,department,school_code
         若部门不存在则自动创建；若 school_code 未给出则用当前管理员所在学校。
+        同一学校、部门下已存在同名老师时跳过；返回新增/跳过数量和逐行错误。
         """
         file = request.FILES.get('file')
         if not file:
             return Response({'detail': '请上传文件'}, status=status.HTTP_400_BAD_REQUEST)
-        import csv, io
-        decoded = file.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(decoded))
-        created = 0
-        for row in reader:
-            name = row.get('name', '').strip()
-            dept_name = row.get('department', '').strip()
-            school_code = row.get('school_code', '').strip() or getattr(request.user.school, 'school_code', None)
-            if not name or not dept_name or not school_code:
-                continue
-            school, _ = School.objects.get_or_create(school_code=school_code, defaults={'school_name': school_code})
-            dept, _ = Department.objects.get_or_create(department_name=dept_name)
-            Teacher.objects.get_or_create(
-                name=name,
-                school=school,
-                department=dept,
+        file.seek(0)
+        try:
+            result = teacher_import.import_teachers(
+                file, default_school_code=getattr(request.user.school, 'school_code', None)
             )
-            created += 1
-        return Response({'detail': '导入完成', 'created': created})
-
-
-class RatingViewSet(viewsets.ModelViewSet):
-    queryset = Rating.objects.select_related('teacher', 'user').all()
+        except UnicodeDecodeError:
+            return Response({'detail': '文件编码错误，请使用 UTF-8 编码的 CSV'}, status=status.HTTP_400_BAD_REQUEST)
+        except csv.Error as e:
+            return Response({'detail': f'CSV 格式错误：{e}'}, status=status.HTTP_400_BAD_REQUEST)
+        admin_stats.invalidate_stats()
+        return Response({'detail': '导入完成', **result})
+
+
+class RatingViewSet(ConditionalGetMixin, ReplicaReadMixin, ValuesListMixin, viewsets.ModelViewSet):
+    # 序列化只用到老师姓名和 user_id：只关联老师表并只取需要的列，不再关联用户表
+    queryset = Rating.objects.select_related('teacher').only(
+        'rating_id', 'teacher', 'teacher__name', 'school', 'user', 'tier', 'reason',
+        'likes', 'dislikes', 'is_featured', 'created_at', 'updated_at',
+    )
     serializer_class = RatingSerializer
+    values_serializer_class = RatingValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'mine')
+    pagination_class = RatingCursorPagination
+
+    # 点赞/点踩对应的计数字段
+    VOTE_COUNTERS = {
+        UserInteraction.LIKE: 'likes',
+        UserInteraction.DISLIKE: 'dislikes',
+    }
+
+    def get_queryset(self):
+        # 与 TeacherViewSet 一致：有学校的用户只能看到本校老师的评分，
+        # 按冗余的 Rating.school 过滤，使用 (school, created_at, rating_id) 索引
+        qs = super().get_queryset()
+        user = self.request.user
+        if user.is_superuser or not getattr(user, 'school_id', None):
+            return qs
+        return qs.filter(school_id=user.school_id)
+
+    def filter_queryset(self, queryset):
+        """
+        评分列表按时间过滤（Asia/Shanghai 本地时间）：
+
+        - ?range=today|month|semester|year|all：本日/本月/本学期/本年，学期按用户所在学校的配置计算
+        - ?since= / ?until=：YYYY-MM-DD 或 ISO 日期时间，until 为日期时包含当天
+
+        过滤条件落在 created_at 上，与学校过滤一起使用 (school, created_at, rating_id) 索引。
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+
+        time_range = params.get('range')
+        if time_range:
+            if time_range not in ranking.TIME_RANGES:
+                raise ValidationError({'range': f'range 必须为 {"/".join(ranking.TIME_RANGES)} 之一'})
+            start = ranking.range_start(time_range, school=getattr(self.request.user, 'school', None))
+            if start is not None:
+                queryset = queryset.filter(created_at__gte=start)
+
+        for param, lookup, end in (('since', 'created_at__gte', False), ('until', 'created_at__lt', True)):
+            value = (params.get(param) or '').strip()
+            if not value:
+                continue
+            try:
+                bound = ranking.parse_time_bound(value, end=end)
+            except ValueError:
+                raise ValidationError({param: f'{param} 必须为 YYYY-MM-DD 日期或 ISO 日期时间'})
+            queryset = queryset.filter(**{lookup: bound})
+        return queryset
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -201,12 +424,18 @@ class RatingViewSet(viewsets.ModelViewSet):
         user = request.user
         if (instance.user_id != user.id) and (not user.is_staff and not user.is_superuser):
             return Response({'detail': '无权删除此评分'}, status=status.HTTP_403_FORBIDDEN)
-        self.perform_destroy(instance)
+        with transaction.atomic():
+            if scores.is_valid(instance.likes, instance.dislikes):
+                scores.apply_rating(instance, -1)
+                keywords.schedule_refresh(instance.teacher_id)
+            rating_id = instance.pk
+            self.perform_destroy(instance)
+            # 点赞缓冲中该评分尚未写回的增量不再需要
+            transaction.on_commit(lambda: vote_buffer.discard(rating_id))
+        admin_stats.invalidate_stats()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_create(self, serializer):
-        from django.db import transaction
-        
         user = self.request.user
         if not user.is_approved:
             raise ValidationError('账号未通过审核，无法评分')
@@ -217,57 +446,42 @@ class RatingViewSet(viewsets.ModelViewSet):
         if user.school and teacher.school and user.school != teacher.school:
             raise ValidationError('不可为其他学校的老师评分')
 
-        # 按等级每日限流
         today = timezone.localdate()
         tier = serializer.validated_data['tier']
-        
-        # 获取学校限制（如果没有学校，使用默认值）
-        if user.school:
-            if tier == 'T1':
-                tier_limit = user.school.daily_t1_limit
-            elif tier == 'T2':
-                tier_limit = user.school.daily_t2_limit
-            elif tier == 'T3':
-                tier_limit = user.school.daily_t3_limit
-            else:
-                tier_limit = 0
-        else:
-            # 默认值：T1=3, T2=2, T3=1
-            tier_limit = {'T1': 3, 'T2': 2, 'T3': 1}.get(tier, 0)
-        
-        # 检查该等级的今日使用次数
-        today_tier_count = UserVote.objects.filter(
-            user=user, 
-            vote_date=today, 
-            tier=tier
-        ).count()
-        
-        if today_tier_count >= tier_limit:
-            raise ValidationError(f'今日{tier}等级评分次数已达上限（{tier_limit}次）')
-
-        # 检查用户今天是否已经对同一个老师评论过
-        today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timezone.timedelta(days=1)
-        existing_rating = Rating.objects.filter(
-            user=user,
-            teacher=teacher,
-            created_at__gte=today_start,
-            created_at__lt=today_end
-        ).first()
-        
-        if existing_rating:
+
+        # 同一事务中：条件 UPDATE 占用当日额度 -> 写入评分 -> 写入 UserVote。
+        # 同一天对同一老师重复评分由 UserVote 的 (user, vote_date, teacher) 唯一约束拦截，
+        # 任一步失败整个事务回滚，额度不会被占用
+        try:
+            with transaction.atomic():
+                if not quota.reserve(user, tier, today):
+                    tier_limit = quota.tier_limits(user).get(tier, 0)
+                    raise ValidationError(f'今日{tier}等级评分次数已达上限（{tier_limit}次）')
+                rating = serializer.save(user=user, school_id=teacher.school_id)
+                UserVote.objects.create(user=user, vote_date=today, teacher=teacher, tier=tier)
+                scores.apply_rating(rating, 1)
+                keywords.schedule_refresh(rating.teacher_id)
+                transaction.on_commit(lambda: admin_stats.adjust_stats(ratings=1, ratings_today=1))
+        except IntegrityError:
             raise ValidationError('您今天已经对该老师进行过评分，请明天再试')
 
-        # 使用事务确保原子性
+    def perform_update(self, serializer):
+        # 先写回点赞缓冲中的增量，旧值的有效性与汇总表中记录的一致
+        if vote_buffer.flush_rating(serializer.instance.pk):
+            serializer.instance.refresh_from_db(fields=['likes', 'dislikes'])
+        previous = copy.copy(serializer.instance)
+        teacher = serializer.validated_data.get('teacher')
         with transaction.atomic():
-            try:
-                serializer.save(user=user)
-                UserVote.objects.create(user=user, vote_date=today, teacher=teacher, tier=tier)
-            except Exception as e:
-                # 如果是唯一性约束错误，提供更友好的错误信息
-                if 'unique' in str(e).lower() or 'duplicate' in str(e).lower():
-                    raise ValidationError('您今天已经对该老师进行过评分，请明天再试')
-                raise
+            # 修改了评分对应的老师时，同步冗余的学校字段
+            if teacher is not None:
+                rating = serializer.save(school_id=teacher.school_id)
+            else:
+                rating = serializer.save()
+            # 换了老师或等级时把评分从旧桶移到新桶；有效评分的内容变化后重新计算新旧老师的关键词
+            scores.apply_rating_change(previous, rating)
+            if scores.is_valid(rating.likes, rating.dislikes):
+                for teacher_id in {previous.teacher_id, rating.teacher_id}:
+                    keywords.schedule_refresh(teacher_id)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mine(self, request):
@@ -278,53 +492,105 @@ class RatingViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(qs, many=True)
         return Response(serializer.data)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
-    def like(self, request, pk=None):
-        rating = self.get_object()
+    def _toggle_vote(self, request, pk, interaction_type, retry=True):
+        """
+        点赞/点踩切换（在调用方的事务中执行）。
+
+        - 锁定当前用户对该评分的 UserInteraction 行（select_for_update），决定计数增量：
+          无记录 -> 新增；同类型 -> 取消；另一类型 -> 切换
+        - 计数使用 F() 表达式在数据库中原子增减，不在 Python 中读改写，
+          并发点击不会丢失更新
+        - 只返回新的计数，不再重新序列化整条评分
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound('评分不存在')
         user = request.user
-        interaction = UserInteraction.objects.filter(user=user, rating=rating).first()
+        other_type = UserInteraction.DISLIKE if interaction_type == UserInteraction.LIKE else UserInteraction.LIKE
+        interaction = UserInteraction.objects.select_for_update().filter(user=user, rating_id=pk).first()
 
-        if interaction and interaction.interaction_type == UserInteraction.LIKE:
-            # 取消点赞
-            rating.likes = max(0, rating.likes - 1)
+        if interaction is None:
+            try:
+                with transaction.atomic():
+                    UserInteraction.objects.create(user=user, rating_id=pk, interaction_type=interaction_type)
+            except IntegrityError:
+                # 同一用户的并发重复点击：另一请求已插入记录，重新按切换逻辑处理一次
+                if not retry:
+                    raise
+                return self._toggle_vote(request, pk, interaction_type, retry=False)
+            current = interaction_type
+            deltas = {interaction_type: 1}
+        elif interaction.interaction_type == interaction_type:
             interaction.delete()
+            current = None
+            deltas = {interaction_type: -1}
         else:
-            # 从点踩切换到点赞
-            if interaction and interaction.interaction_type == UserInteraction.DISLIKE:
-                rating.dislikes = max(0, rating.dislikes - 1)
-                interaction.interaction_type = UserInteraction.LIKE
-                interaction.save(update_fields=['interaction_type'])
-            else:
-                UserInteraction.objects.create(user=user, rating=rating, interaction_type=UserInteraction.LIKE)
-            rating.likes = (rating.likes or 0) + 1
+            interaction.interaction_type = interaction_type
+            interaction.save(update_fields=['interaction_type'])
+            current = interaction_type
+            deltas = {interaction_type: 1, other_type: -1}
+
+        counter_deltas = {self.VOTE_COUNTERS[kind]: delta for kind, delta in deltas.items()}
+        if vote_buffer.enabled():
+            counts = self._buffer_vote_counters(pk, counter_deltas)
+        else:
+            counts = self._apply_vote_counters(pk, counter_deltas)
 
-        rating.save(update_fields=['likes', 'dislikes'])
-        serializer = self.get_serializer(rating)
-        return Response(serializer.data)
+        stats_deltas = {f'total_{field}': delta for field, delta in counter_deltas.items()}
+        transaction.on_commit(lambda: admin_stats.adjust_stats(**stats_deltas))
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
-    def dislike(self, request, pk=None):
-        rating = self.get_object()
-        user = request.user
-        interaction = UserInteraction.objects.filter(user=user, rating=rating).first()
+        return Response({
+            'rating_id': pk,
+            'likes': counts['likes'],
+            'dislikes': counts['dislikes'],
+            'interaction': current,
+        })
 
-        if interaction and interaction.interaction_type == UserInteraction.DISLIKE:
-            # 取消点踩
-            rating.dislikes = max(0, rating.dislikes - 1)
-            interaction.delete()
-        else:
-            # 从点赞切换到点踩
-            if interaction and interaction.interaction_type == UserInteraction.LIKE:
-                rating.likes = max(0, rating.likes - 1)
-                interaction.interaction_type = UserInteraction.DISLIKE
-                interaction.save(update_fields=['interaction_type'])
-            else:
-                UserInteraction.objects.create(user=user, rating=rating, interaction_type=UserInteraction.DISLIKE)
-            rating.dislikes = (rating.dislikes or 0) + 1
+    def _apply_vote_counters(self, pk, counter_deltas):
+        """直接更新 api_rating 计数，并同步 TeacherScore 有效性"""
+        counters = {
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in counter_deltas.items()
+        }
+        if not self.get_queryset().filter(pk=pk).update(**counters):
+            raise NotFound('评分不存在')
 
-        rating.save(update_fields=['likes', 'dislikes'])
-        serializer = self.get_serializer(rating)
-        return Response(serializer.data)
+        rating = Rating.objects.only('rating_id', 'teacher_id', 'tier', 'created_at', 'likes', 'dislikes').get(pk=pk)
+        was_valid = scores.is_valid(
+            rating.likes - counter_deltas.get('likes', 0),
+            rating.dislikes - counter_deltas.get('dislikes', 0),
+        )
+        if scores.apply_validity_change(rating, was_valid):
+            keywords.schedule_refresh(rating.teacher_id)
+        return {'likes': rating.likes, 'dislikes': rating.dislikes}
+
+    def _buffer_vote_counters(self, pk, counter_deltas):
+        """
+        缓冲模式（VOTE_BUFFER_ENABLED）：计数增量在事务提交后写入 vote_buffer，
+        由后台线程或 flush_vote_buffers 命令批量写回；返回叠加了未写回增量的计数。
+        """
+        counts = self.get_queryset().filter(pk=pk).values('rating_id', 'likes', 'dislikes').first()
+        if counts is None:
+            raise NotFound('评分不存在')
+
+        vote_buffer.merge_pending(counts)
+        for field, delta in counter_deltas.items():
+            counts[field] = max(counts[field] + delta, 0)
+        transaction.on_commit(lambda: vote_buffer.add(counts['rating_id'], **counter_deltas))
+        # 计数写回时 vote_buffer 按学校合并递增数据版本，这里不逐次递增
+        self.defer_version_bump = True
+        return counts
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @transaction.atomic
+    def like(self, request, pk=None):
+        return self._toggle_vote(request, pk, UserInteraction.LIKE)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @transaction.atomic
+    def dislike(self, request, pk=None):
+        return self._toggle_vote(request, pk, UserInteraction.DISLIKE)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def toggle_featured(self, request, pk=None):
@@ -340,64 +606,27 @@ class RatingViewSet(viewsets.ModelViewSet):
         })
 
 
-class UserVoteViewSet(viewsets.ModelViewSet):
+class UserVoteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = UserVote.objects.select_related('user', 'teacher').all()
     serializer_class = UserVoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_actions = ('quota',)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def quota(self, request):
         """
         返回当前用户今日额度：按等级分别返回 limit/used/remaining。
         """
-        user = request.user
-        today = timezone.localdate()
-        
-        # 获取学校限制（如果没有学校，使用默认值）
-        if user.school:
-            t1_limit = user.school.daily_t1_limit
-            t2_limit = user.school.daily_t2_limit
-            t3_limit = user.school.daily_t3_limit
-        else:
-            t1_limit = 3
-            t2_limit = 2
-            t3_limit = 1
-        
-        # 统计各等级今日使用次数
-        t1_used = UserVote.objects.filter(user=user, vote_date=today, tier='T1').count()
-        t2_used = UserVote.objects.filter(user=user, vote_date=today, tier='T2').count()
-        t3_used = UserVote.objects.filter(user=user, vote_date=today, tier='T3').count()
-        
-        return Response({
-            'T1': {
-                'limit': t1_limit,
-                'used': t1_used,
-                'remaining': max(t1_limit - t1_used, 0)
-            },
-            'T2': {
-                'limit': t2_limit,
-                'used': t2_used,
-                'remaining': max(t2_limit - t2_used, 0)
-            },
-            'T3': {
-                'limit': t3_limit,
-                'used': t3_used,
-                'remaining': max(t3_limit - t3_used, 0)
-            },
-            # 兼容旧版本
-            'limit': t1_limit + t2_limit + t3_limit,
-            'used': t1_used + t2_used + t3_used,
-            'remaining': max(t1_limit - t1_used, 0) + max(t2_limit - t2_used, 0) + max(t3_limit - t3_used, 0)
-        })
+        return Response(quota.get_quota(request.user))
 
 
-class UserInteractionViewSet(viewsets.ModelViewSet):
+class UserInteractionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = UserInteraction.objects.select_related('user', 'rating').all()
     serializer_class = UserInteractionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.select_related('school').all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -542,6 +771,9 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         # 只更新password字段，提高效率
         # update_fields=['password'] 确保只更新密码字段，不会触发其他字段的更新
         user.save(update_fields=['password'])
+
+        # 已缓存的 Token 认证结果作废，其他进程在 AUTH_TOKEN_CACHE_TTL 内过期
+        authentication.invalidate_user(user.pk)
         
         # ========== 步骤8：返回成功响应 ==========
         
@@ -599,6 +831,8 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         user.can_rate = True
         user.approval_status = User.APPROVAL_APPROVED
         user.save(update_fields=['is_approved', 'can_rate', 'approval_status'])
+        authentication.invalidate_user(user.pk)
+        admin_stats.invalidate_stats()
         return Response({'detail': '用户已通过审批'})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
@@ -612,6 +846,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'detail': '缺少 can_rate 参数'}, status=status.HTTP_400_BAD_REQUEST)
         user.can_rate = bool(can_rate) if isinstance(can_rate, bool) else str(can_rate).lower() in ['1', 'true', 'yes']
         user.save(update_fields=['can_rate'])
+        authentication.invalidate_user(user.pk)
         return Response({'detail': '评分权限已更新', 'can_rate': user.can_rate})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
@@ -627,6 +862,8 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         user.can_rate = False
         user.approval_status = User.APPROVAL_REJECTED
         user.save(update_fields=['is_approved', 'can_rate', 'approval_status'])
+        authentication.invalidate_user(user.pk)
+        admin_stats.invalidate_stats()
         return Response({'detail': '用户已被拒绝，评分权限已关闭'})
 
     @action(detail=True, methods=['delete'], permission_classes=[permissions.IsAdminUser])
@@ -638,7 +875,8 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'detail': '不能删除当前登录账号'}, status=status.HTTP_400_BAD_REQUEST)
         if admin_school and user.school and admin_school != user.school and not request.user.is_superuser:
             return Response({'detail': '无权删除其他学校用户'}, status=status.HTTP_403_FORBIDDEN)
-        user.delete()
+        delete_user_and_ratings(user)
+        admin_stats.invalidate_stats()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -646,6 +884,12 @@ class SignupViewSet(mixins.CreateModelMixin, GenericViewSet):
     queryset = User.objects.all()
     serializer_class = SignupSerializer
     permission_classes = [permissions.AllowAny]
+    # 按 IP 限制注册频率（api/throttling.py）
+    throttle_classes = [throttling.SignupIPThrottle]
+
+    def perform_create(self, serializer):
+        serializer.save()
+        admin_stats.invalidate_stats()
 
 
 class LoginUserViewSet(viewsets.ViewSet):
@@ -660,16 +904,19 @@ class LoginUserViewSet(viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
     - 允许未认证用户访问（因为登录本身就需要未认证状态）
     - 登录成功后，后续请求需要使用返回的 Token 进行身份验证
+    - 按 IP 和登录账号限流（throttle_classes），超出速率返回 429
     
     认证流程：
     1. 接收登录请求（用户名/邮箱 + 密码）
-    2. 查找用户（先按用户名，再按邮箱）
-    3. 验证密码（使用 Django 的 authenticate 函数）
+    2. 查找用户（一条查询同时匹配用户名和邮箱）
+    3. 验证密码（在查到的用户对象上校验，不重复查询）
     4. 检查账户状态（审批状态、激活状态）
-    5. 生成或获取 Token
+    5. 签发新的 Token
     6. 返回 Token 和用户信息
     """
     permission_classes = [permissions.AllowAny]
+    # 按 IP 和登录账号限流，在密码校验之前拦截撞库请求（api/throttling.py）
+    throttle_classes = throttling.LOGIN_THROTTLES
 
     def create(self, request):
         """
@@ -699,6 +946,7 @@ class LoginUserViewSet(viewsets.ViewSet):
         响应格式（失败）：
         - 400 Bad Request: {"detail": "用户不存在"} 或 {"detail": "认证失败"}
         - 403 Forbidden: {"detail": "账号待审批，登录受限"} 等
+        - 429 Too Many Requests: {"detail": "登录人数过多，请稍后重试"}（密码校验排队已满）
         
         @param request: Django REST Framework 的请求对象
         @return: Response 对象，包含登录结果
@@ -717,24 +965,9 @@ class LoginUserViewSet(viewsets.ViewSet):
         
         # ========== 步骤2：查找用户 ==========
         
-        user = None  # 初始化用户变量
-        
-        # 如果提供了标识符，尝试查找用户
-        if identifier:
-            # 策略1：先尝试按用户名查找
-            # 这是最常见的登录方式，优先尝试可以提高查找效率
-            try:
-                # User.objects.get() 是 Django ORM 的查询方法
-                # 如果找到用户，返回 User 对象；如果找不到，抛出 User.DoesNotExist 异常
-                user = User.objects.get(username=identifier)
-            except User.DoesNotExist:
-                # 如果按用户名找不到，尝试按邮箱查找
-                # 这允许用户使用邮箱登录，提高了灵活性
-                try:
-                    user = User.objects.get(email=identifier)
-                except User.DoesNotExist:
-                    # 如果两种方式都找不到，user 保持为 None
-                    pass
+        # 用一条 username = ? OR email = ? 查询同时按用户名和邮箱查找（api/backends.py）
+        # 两者匹配到不同用户时以用户名为准；找不到时返回 None
+        user = backends.find_user(identifier)
         
         # ========== 步骤3：验证用户是否存在 ==========
         
@@ -749,24 +982,29 @@ class LoginUserViewSet(viewsets.ViewSet):
         
         # ========== 步骤4：验证密码 ==========
         
-        # 使用 Django 的 authenticate 函数验证密码
-        # authenticate 是 Django 提供的标准身份验证函数
-        # 
+        # 直接在上面查到的用户对象上校验密码，不再通过 authenticate() 按用户名重新查询
+        # 哈希计算在独立的进程池中执行（api/passwords.py），不占用 Web 工作进程的 CPU；
+        # 排队已满时返回 429，哈希算法或参数过时则在登录成功时自动升级
+        #
         # 工作原理：
-        # 1. 从数据库中获取用户的密码哈希
+        # 1. 从 password 字段解析算法、迭代次数、盐值
         # 2. 使用 PBKDF2 算法对输入的密码进行哈希（使用相同的盐值）
         # 3. 比较计算出的哈希值与存储的哈希值
-        # 4. 如果匹配，返回 User 对象；如果不匹配，返回 None
+        # 4. 匹配且账户未停用时返回该用户对象，否则返回 None
         #
         # 安全特性：
         # - 密码使用 PBKDF2 算法哈希，默认 260,000 次迭代
         # - 每个密码都有唯一的盐值，防止彩虹表攻击
         # - 密码哈希是单向的，无法反向获取原始密码
-        auth_user = authenticate(
-            request,                    # 请求对象（用于获取请求上下文）
-            username=user.username,     # 必须使用数据库中的用户名（不是用户输入的标识符）
-            password=password           # 用户输入的明文密码
-        )
+        try:
+            auth_user = backends.authenticate_login(user, password)
+        except passwords.HashingBusy:
+            # 登录高峰时密码校验排队已满，立即返回 429，客户端稍后重试
+            return Response(
+                {'detail': '登录人数过多，请稍后重试'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '1'},
+            )
         
         # 如果密码验证失败，返回错误响应
         if not auth_user:
@@ -809,21 +1047,16 @@ class LoginUserViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # ========== 步骤7：生成或获取 Token ==========
+        # ========== 步骤7：签发 Token ==========
         
-        # 使用 get_or_create 方法获取或创建 Token
-        # 这是 Django ORM 的便捷方法，如果 Token 已存在则返回，不存在则创建
-        #
-        # 返回值：
-        # - token: Token 对象
-        # - created: 布尔值，True 表示新创建，False 表示已存在
+        # 每次登录签发一个新的 Token（api.authentication.issue_token）
         #
         # Token 特性：
-        # - 每个用户只有一个 Token（OneToOne 关系）
+        # - 同一用户可在多台设备登录，每台设备各持有一个 Token
         # - Token key 是 40 字符的随机十六进制字符串
-        # - Token 持久存在，直到显式删除或用户被删除
-        # - 如果用户多次登录，返回相同的 Token（不重新生成）
-        token, _ = Token.objects.get_or_create(user=auth_user)
+        # - 有效期 AUTH_TOKEN_LIFETIME（默认 7 天），持续使用时自动续期，长期不用则过期
+        # - 过期的 Token 由 purge_expired_tokens 命令定期清理
+        token_key = authentication.issue_token(auth_user, request)
         
         # ========== 步骤8：返回成功响应 ==========
         
@@ -831,7 +1064,7 @@ class LoginUserViewSet(viewsets.ViewSet):
         # 前端会将 Token 存储到 localStorage，用于后续请求的身份验证
         return Response({
             'detail': '登录成功',           # 成功消息
-            'token': token.key,            # 身份验证令牌（40字符）
+            'token': token_key,            # 身份验证令牌（40字符）
             'user_id': auth_user.id        # 用户ID，用于前端识别用户
         })
 
@@ -847,13 +1080,14 @@ class AdminLoginViewSet(viewsets.ViewSet):
     权限设置：
     permission_classes = [permissions.AllowAny]
     - 允许未认证用户访问（登录接口本身需要未认证状态）
+    - 按 IP 和登录账号限流（throttle_classes），超出速率返回 429
     
     认证流程：
     1. 接收登录请求（学校代码 + 用户名 + 密码）
     2. 验证用户名和密码
     3. 检查用户是否为管理员（is_staff=True）
     4. 验证学校代码是否匹配
-    5. 生成或获取 Token
+    5. 签发新的 Token
     6. 返回 Token、用户ID和学校代码
     
     安全特性：
@@ -862,6 +1096,8 @@ class AdminLoginViewSet(viewsets.ViewSet):
     - 防止管理员跨学校操作
     """
     permission_classes = [permissions.AllowAny]
+    # 按 IP 和登录账号限流，在密码校验之前拦截撞库请求（api/throttling.py）
+    throttle_classes = throttling.LOGIN_THROTTLES
 
     def create(self, request):
         """
@@ -889,6 +1125,7 @@ class AdminLoginViewSet(viewsets.ViewSet):
         
         响应格式（失败）：
         - 400 Bad Request: {"detail": "认证失败"} 或 {"detail": "学校代码不匹配"}
+        - 429 Too Many Requests: {"detail": "登录人数过多，请稍后重试"}（密码校验排队已满）
         
         @param request: Django REST Framework 的请求对象
         @return: Response 对象，包含登录结果
@@ -907,9 +1144,16 @@ class AdminLoginViewSet(viewsets.ViewSet):
         
         # ========== 步骤2：验证用户名和密码 ==========
         
-        # 使用 Django 的 authenticate 函数验证用户名和密码
-        # 这与普通用户登录使用相同的密码验证机制（PBKDF2 哈希）
-        user = authenticate(request, username=username, password=password)
+        # 与普通用户登录使用相同的密码验证机制（一条查询找到用户，进程池中校验 PBKDF2 哈希）
+        try:
+            user = backends.authenticate_login(backends.find_user(username), password)
+        except passwords.HashingBusy:
+            # 登录高峰时密码校验排队已满，立即返回 429，客户端稍后重试
+            return Response(
+                {'detail': '登录人数过多，请稍后重试'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '1'},
+            )
         
         # ========== 步骤3：检查用户是否存在且为管理员 ==========
         
@@ -936,11 +1180,10 @@ class AdminLoginViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # ========== 步骤5：生成或获取 Token ==========
+        # ========== 步骤5：签发 Token ==========
         
         # 发放 Token（与普通用户登录使用相同的机制）
-        # get_or_create 确保每个用户只有一个 Token
-        token, _ = Token.objects.get_or_create(user=user)
+        token_key = authentication.issue_token(user, request)
         
         # ========== 步骤6：返回成功响应 ==========
         
@@ -950,7 +1193,7 @@ class AdminLoginViewSet(viewsets.ViewSet):
             'detail': '登录成功',           # 成功消息
             'user_id': user.id,            # 用户ID
             'school_code': school_code,    # 学校代码（用于前端权限控制）
-            'token': token.key,            # 身份验证令牌
+            'token': token_key,            # 身份验证令牌
         })
 
 
@@ -965,13 +1208,14 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
     权限设置：
     permission_classes = [permissions.AllowAny]
     - 允许未认证用户访问（登录接口本身需要未认证状态）
+    - 按 IP 和登录账号限流（throttle_classes），超出速率返回 429
     
     认证流程：
     1. 接收登录请求（用户名 + 密码）
     2. 验证用户名和密码
     3. 检查用户是否为超级管理员（is_superuser=True）
     4. 检查账户是否激活（is_active=True）
-    5. 生成或获取 Token
+    5. 签发新的 Token
     6. 返回 Token、用户ID和用户名
     
     安全特性：
@@ -980,6 +1224,8 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
     - 建议超级管理员使用强密码并启用双因素认证
     """
     permission_classes = [permissions.AllowAny]
+    # 按 IP 和登录账号限流，在密码校验之前拦截撞库请求（api/throttling.py）
+    throttle_classes = throttling.LOGIN_THROTTLES
 
     def create(self, request):
         """
@@ -1007,6 +1253,7 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
         响应格式（失败）：
         - 400 Bad Request: {"detail": "认证失败：需要超级管理员权限"}
         - 403 Forbidden: {"detail": "账号已停用"}
+        - 429 Too Many Requests: {"detail": "登录人数过多，请稍后重试"}（密码校验排队已满）
         
         @param request: Django REST Framework 的请求对象
         @return: Response 对象，包含登录结果
@@ -1021,9 +1268,16 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
         
         # ========== 步骤2：验证用户名和密码 ==========
         
-        # 使用 Django 的 authenticate 函数验证用户名和密码
-        # 这与普通用户和管理员登录使用相同的密码验证机制
-        user = authenticate(request, username=username, password=password)
+        # 与普通用户和管理员登录使用相同的密码验证机制
+        try:
+            user = backends.authenticate_login(backends.find_user(username), password)
+        except passwords.HashingBusy:
+            # 登录高峰时密码校验排队已满，立即返回 429，客户端稍后重试
+            return Response(
+                {'detail': '登录人数过多，请稍后重试'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '1'},
+            )
         
         # ========== 步骤3：检查用户是否存在且为超级管理员 ==========
         
@@ -1048,11 +1302,10 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # ========== 步骤5：生成或获取 Token ==========
+        # ========== 步骤5：签发 Token ==========
         
         # 发放 Token（与其他登录方式使用相同的机制）
-        # get_or_create 确保每个用户只有一个 Token
-        token, _ = Token.objects.get_or_create(user=user)
+        token_key = authentication.issue_token(user, request)
         
         # ========== 步骤6：返回成功响应 ==========
         
@@ -1062,11 +1315,21 @@ class SuperAdminLoginViewSet(viewsets.ViewSet):
             'detail': '超级管理员登录成功',  # 成功消息
             'user_id': user.id,            # 用户ID
             'username': user.username,      # 用户名（用于前端显示）
-            'token': token.key,            # 身份验证令牌
+            'token': token_key,            # 身份验证令牌
         })
 
 
-class SuperAdminViewSet(viewsets.ViewSet):
+class ObtainExpiringAuthToken(ObtainAuthToken):
+    """/api/token-auth/：参数与 DRF 自带接口相同（username、password），签发带过期时间的 Token"""
+    throttle_classes = throttling.LOGIN_THROTTLES
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response({'token': authentication.issue_token(serializer.validated_data['user'], request)})
+
+
+class SuperAdminViewSet(ConditionalGetMixin, ReplicaReadMixin, viewsets.ViewSet):
     """超级管理员专用视图集：可以管理所有内容"""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -1081,29 +1344,27 @@ class SuperAdminViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """系统统计信息"""
+        """系统统计信息（短时缓存，?fresh=1 跳过缓存）"""
         check = self.check_superuser(request)
         if check:
             return check
         
-        from django.db.models import Count, Q
-        from django.utils import timezone
-        
-        today = timezone.localdate()
-        stats = {
-            'schools': School.objects.count(),
-            'teachers': Teacher.objects.count(),
-            'users': User.objects.count(),
-            'admins': User.objects.filter(is_staff=True).count(),
-            'ratings': Rating.objects.count(),
-            'ratings_today': Rating.objects.filter(created_at__date=today).count(),
-            'pending_users': User.objects.filter(approval_status=User.APPROVAL_PENDING).count(),
-            'approved_users': User.objects.filter(approval_status=User.APPROVAL_APPROVED).count(),
-            'rejected_users': User.objects.filter(approval_status=User.APPROVAL_REJECTED).count(),
-            'total_likes': UserInteraction.objects.filter(interaction_type=UserInteraction.LIKE).count(),
-            'total_dislikes': UserInteraction.objects.filter(interaction_type=UserInteraction.DISLIKE).count(),
+        fresh = request.query_params.get('fresh') in ('1', 'true')
+        return Response(admin_stats.get_stats(fresh=fresh))
+
+    @action(detail=False, methods=['get'])
+    def throttle_stats(self, request):
+        """当前进程的登录/注册限流计数：{since, scopes: {scope: {allowed, throttled}}, rates}"""
+        check = self.check_superuser(request)
+        if check:
+            return check
+
+        data = throttling.counters.snapshot()
+        data['rates'] = {
+            throttle.scope: throttle.THROTTLE_RATES.get(throttle.scope)
+            for throttle in throttling.LOGIN_THROTTLES + [throttling.SignupIPThrottle]
         }
-        return Response(stats)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def all_ratings(self, request):
@@ -1112,10 +1373,44 @@ class SuperAdminViewSet(viewsets.ViewSet):
         if check:
             return check
         
+        # ?voters=0：不返回点赞/点踩用户列表（详情页再通过 voters 接口获取）
+        include_voters = request.query_params.get('voters', '1') not in ('0', 'false')
         ratings = Rating.objects.select_related('user', 'teacher', 'teacher__school').all()
-        serializer = SuperAdminRatingSerializer(ratings, many=True, context={'request': request})
+        if include_voters:
+            ratings = SuperAdminRatingSerializer.prefetch_voters(ratings)
+        context = {'request': request, 'include_voters': include_voters}
+
+        paginator = RatingCursorPagination()
+        page = paginator.paginate_queryset(ratings, request, view=self)
+        if page is not None:
+            serializer = SuperAdminRatingSerializer(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+        serializer = SuperAdminRatingSerializer(ratings, many=True, context=context)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def voters(self, request, pk=None):
+        """获取单条评分的点赞/点踩用户列表"""
+        check = self.check_superuser(request)
+        if check:
+            return check
+
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return Response({'detail': '评分不存在'}, status=status.HTTP_404_NOT_FOUND)
+        if not Rating.objects.filter(rating_id=pk).exists():
+            return Response({'detail': '评分不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        interactions = list(
+            UserInteraction.objects.filter(rating_id=pk).select_related('user').order_by('created_at')
+        )
+        return Response({
+            'rating_id': pk,
+            'liked_users': SuperAdminRatingSerializer.voter_list(interactions, UserInteraction.LIKE),
+            'disliked_users': SuperAdminRatingSerializer.voter_list(interactions, UserInteraction.DISLIKE),
+        })
+
     @action(detail=False, methods=['post'])
     def create_school(self, request):
         """创建新学校"""
@@ -1142,6 +1437,7 @@ class SuperAdminViewSet(viewsets.ViewSet):
             daily_t2_limit=int(request.data.get('daily_t2_limit', 2)),
             daily_t3_limit=int(request.data.get('daily_t3_limit', 1))
         )
+        admin_stats.invalidate_stats()
         serializer = SchoolSerializer(school)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -1185,6 +1481,7 @@ class SuperAdminViewSet(viewsets.ViewSet):
             approval_status=User.APPROVAL_APPROVED,
             is_active=True
         )
+        admin_stats.invalidate_stats()
         serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -1196,6 +1493,11 @@ class SuperAdminViewSet(viewsets.ViewSet):
             return check
         
         users = User.objects.select_related('school').all()
+        paginator = PrimaryKeyCursorPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        if page is not None:
+            serializer = SuperAdminUserSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         serializer = SuperAdminUserSerializer(users, many=True)
         return Response(serializer.data)
 
@@ -1279,6 +1581,8 @@ class SuperAdminViewSet(viewsets.ViewSet):
             user.set_password(request.data['password'])
         
         user.save()
+        authentication.invalidate_user(user.pk)
+        admin_stats.invalidate_stats()
         serializer = SuperAdminUserSerializer(user)
         return Response(serializer.data)
 
@@ -1302,7 +1606,8 @@ class SuperAdminViewSet(viewsets.ViewSet):
         if user.is_superuser and User.objects.filter(is_superuser=True).count() <= 1:
             return Response({'detail': '不能删除最后一个超级管理员'}, status=status.HTTP_400_BAD_REQUEST)
         
-        user.delete()
+        delete_user_and_ratings(user)
+        admin_stats.invalidate_stats()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post'])
@@ -1329,6 +1634,14 @@ class SuperAdminViewSet(viewsets.ViewSet):
             school.daily_t2_limit = int(request.data['daily_t2_limit'])
         if 'daily_t3_limit' in request.data:
             school.daily_t3_limit = int(request.data['daily_t3_limit'])
+        if 'semester_starts' in request.data:
+            try:
+                starts = ranking.parse_semester_starts(request.data['semester_starts'])
+            except ValueError:
+                return Response(
+                    {'detail': 'semester_starts 必须是 YYYY-MM-DD 日期列表'}, status=status.HTTP_400_BAD_REQUEST
+                )
+            school.semester_starts = [start.isoformat() for start in starts]
         
         school.save()
         serializer = SchoolSerializer(school)
@@ -1347,6 +1660,8 @@ class SuperAdminViewSet(viewsets.ViewSet):
             return Response({'detail': '学校不存在'}, status=status.HTTP_404_NOT_FOUND)
         
         school.delete()
+        authentication.clear_token_cache()
+        admin_stats.invalidate_stats()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['delete'])
@@ -1361,7 +1676,14 @@ class SuperAdminViewSet(viewsets.ViewSet):
         except Rating.DoesNotExist:
             return Response({'detail': '评分不存在'}, status=status.HTTP_404_NOT_FOUND)
         
-        rating.delete()
+        with transaction.atomic():
+            if scores.is_valid(rating.likes, rating.dislikes):
+                scores.apply_rating(rating, -1)
+                keywords.schedule_refresh(rating.teacher_id)
+            rating_id = rating.pk
+            rating.delete()
+            transaction.on_commit(lambda: vote_buffer.discard(rating_id))
+        admin_stats.invalidate_stats()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post'])
@@ -1385,6 +1707,7 @@ class SuperAdminViewSet(viewsets.ViewSet):
         
         user.set_password(new_password)
         user.save(update_fields=['password'])
+        authentication.invalidate_user(user.pk)
         return Response({'detail': '密码重置成功'})
 
     @action(detail=True, methods=['post'])
@@ -1409,8 +1732,6 @@ class SuperAdminViewSet(viewsets.ViewSet):
         old_code = school.school_code
         
         # 由于 school_code 是主键，需要使用数据库事务来更新
-        from django.db import transaction
-        
         with transaction.atomic():
             # 1. 创建新学校记录（使用新代码，复制所有数据）
             new_school = School.objects.create(
@@ -1418,6 +1739,10 @@ class SuperAdminViewSet(viewsets.ViewSet):
                 school_name=school.school_name,
                 address=school.address,
                 daily_rating_limit=school.daily_rating_limit,
+                daily_t1_limit=school.daily_t1_limit,
+                daily_t2_limit=school.daily_t2_limit,
+                daily_t3_limit=school.daily_t3_limit,
+                semester_starts=school.semester_starts,
                 created_at=school.created_at
             )
             
@@ -1428,8 +1753,12 @@ class SuperAdminViewSet(viewsets.ViewSet):
             # 更新老师
             Teacher.objects.filter(school=school).update(school=new_school)
             
+            # 更新评分上冗余的学校字段
+            Rating.objects.filter(school=school).update(school=new_school)
+            
             # 3. 删除旧学校记录
             school.delete()
+        authentication.clear_token_cache()
         
         return Response({
             'detail': '学校代码更新成功，所有相关记录已同步更新',
@@ -0,0 +1,326 @@
+"""
+点赞/点踩计数的写后缓冲（write-behind），用于热门评分。
+
+开启 VOTE_BUFFER_ENABLED 后：
+- like/dislike 仍立即写入 UserInteraction（谁点了什么），但 likes/dislikes 增量只累加到缓冲里，
+  不再每次点击都去 UPDATE 同一行 api_rating，避免热门评分上的行锁排队
+- 后台线程每 VOTE_BUFFER_FLUSH_INTERVAL_MS 毫秒调用 flush()，把所有增量合并成一条
+  UPDATE ... SET likes = CASE rating_id WHEN ... END 批量写回，并同步 TeacherScore 有效性
+- 读取评分时调用 merge_pending() 叠加尚未写回的增量，保证响应与点击结果一致
+- 也可以通过 `python manage.py flush_vote_buffers` 手动（或定时）写回
+
+缓冲存放在 Django cache 的 VOTE_BUFFER_CACHE 别名下，必须是各进程共享且 incr 原子的缓存
+（Redis/Memcached，见 settings.SHARED_CACHE_URL）：进程内缓存会在工作进程被回收时丢失增量，
+flush_vote_buffers 命令也看不到其他进程的缓冲，因此 check_cache() 在启动时拒绝这类配置。
+计数使用 cache.add/incr 原子累加；待写回的评分 ID 记录在一个递增序号的槽位日志中。
+工作进程退出时（gunicorn worker_exit 钩子和 atexit）调用 flush_on_exit() 写回剩余增量。
+"""
+import atexit
+import logging
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from . import keywords, scores, versions
+from .models import Rating
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'votebuf'
+SEQ_KEY = f'{KEY_PREFIX}:seq'
+FLUSHED_KEY = f'{KEY_PREFIX}:flushed'
+LOCK_KEY = f'{KEY_PREFIX}:lock'
+GAP_KEY = f'{KEY_PREFIX}:gap'
+LOCK_TIMEOUT = 60
+# 槽位日志中缺失的槽位（写入方递增序号后退出，或槽位被淘汰）最多等待的秒数，超过后跳过，不再阻塞后续增量
+SLOT_GRACE_SECONDS = 5
+# 登记标记的有效期：槽位被跳过后，该评分的下一次点击在标记过期后重新登记，累积的增量一并写回
+DIRTY_TIMEOUT = 300
+COUNTER_FIELDS = ('likes', 'dislikes')
+
+# 不跨进程共享、或 incr 不是原子操作的缓存后端，不能存放缓冲
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+    'backend.lru_cache.LRUMemoryCache',
+)
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, 'VOTE_BUFFER_ENABLED', False)
+
+
+def check_cache():
+    """
+    开启缓冲时确认缓冲所在的缓存是共享后端，否则拒绝启动；并注册进程退出时的写回。
+    在 ApiConfig.ready 中调用。
+    """
+    if not enabled():
+        return
+    alias = getattr(settings, 'VOTE_BUFFER_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend in LOCAL_CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f'VOTE_BUFFER_ENABLED 需要共享缓存：缓存 {alias!r} 使用的 {backend} 不跨进程共享，'
+            f'请设置 SHARED_CACHE_URL（Redis）'
+        )
+    atexit.register(flush_on_exit)
+
+
+def _cache():
+    return caches[getattr(settings, 'VOTE_BUFFER_CACHE', 'default')]
+
+
+def _counter_key(rating_id, field):
+    return f'{KEY_PREFIX}:{field}:{rating_id}'
+
+
+def _dirty_key(rating_id):
+    return f'{KEY_PREFIX}:dirty:{rating_id}'
+
+
+def _slot_key(seq):
+    return f'{KEY_PREFIX}:slot:{seq}'
+
+
+def _incr(cache, key, delta):
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key, delta)
+
+
+def add(rating_id, likes=0, dislikes=0):
+    """累加一条评分的计数增量，并在需要时登记到待写回日志"""
+    cache = _cache()
+    for field, delta in (('likes', likes), ('dislikes', dislikes)):
+        if delta:
+            _incr(cache, _counter_key(rating_id, field), delta)
+
+    # 先累加计数再登记：flush 先清除登记标记再读取计数，因此不会漏掉增量
+    if cache.add(_dirty_key(rating_id), 1, timeout=DIRTY_TIMEOUT):
+        seq = _incr(cache, SEQ_KEY, 1)
+        cache.set(_slot_key(seq), rating_id, timeout=None)
+
+    _ensure_flusher()
+
+
+def pending(rating_ids):
+    """返回 {rating_id: {'likes': n, 'dislikes': n}}，只包含有未写回增量的评分"""
+    rating_ids = list(rating_ids)
+    if not rating_ids:
+        return {}
+    keys = {
+        _counter_key(rating_id, field): (rating_id, field)
+        for rating_id in rating_ids for field in COUNTER_FIELDS
+    }
+    result = {}
+    for key, value in _cache().get_many(list(keys)).items():
+        if value:
+            rating_id, field = keys[key]
+            result.setdefault(rating_id, {'likes': 0, 'dislikes': 0})[field] = value
+    return result
+
+
+def merge_pending(data):
+    """
+    把未写回的增量叠加到已序列化的评分数据上（单个 dict 或 dict 列表），原地修改并返回。
+
+    与写回时一样，叠加后的计数不小于 0。
+    """
+    if not enabled() or not data:
+        return data
+    items = data if isinstance(data, list) else [data]
+    deltas = pending(item['rating_id'] for item in items if 'rating_id' in item)
+    for item in items:
+        delta = deltas.get(item.get('rating_id'))
+        if not delta:
+            continue
+        for field in COUNTER_FIELDS:
+            if field in item:
+                item[field] = max(item[field] + delta[field], 0)
+    return data
+
+
+def _take(cache, key):
+    """取出计数并原子地减去已取出的部分（期间新累加的增量保留到下一轮）"""
+    value = cache.get(key) or 0
+    if value:
+        cache.incr(key, -value)
+    return value
+
+
+def _take_rating(cache, rating_id):
+    delta = {field: _take(cache, _counter_key(rating_id, field)) for field in COUNTER_FIELDS}
+    return delta if delta['likes'] or delta['dislikes'] else None
+
+
+def _collect(cache):
+    """从槽位日志中取出待写回的评分及其增量"""
+    start = cache.get(FLUSHED_KEY, 0)
+    end = cache.get(SEQ_KEY, 0)
+    if end <= start:
+        return {}
+
+    slots = cache.get_many([_slot_key(seq) for seq in range(start + 1, end + 1)])
+    rating_ids = []
+    for seq in range(start + 1, end + 1):
+        rating_id = slots.get(_slot_key(seq))
+        if rating_id is not None:
+            rating_ids.append(rating_id)
+            continue
+        # 写入方已递增序号但槽位尚未写入：通常下一轮就会出现，留到下一轮从这里继续；
+        # 同一个缺口超过 SLOT_GRACE_SECONDS 仍未写入（写入方已退出或槽位被淘汰）则跳过
+        gap = cache.get(GAP_KEY)
+        if gap is not None and gap[0] == seq and time.time() - gap[1] >= SLOT_GRACE_SECONDS:
+            logger.warning('跳过缺失的点赞缓冲槽位 %s', seq)
+            continue
+        if gap is None or gap[0] != seq:
+            cache.set(GAP_KEY, (seq, time.time()), timeout=None)
+        end = seq - 1
+        break
+
+    cache.set(FLUSHED_KEY, end, timeout=None)
+    cache.delete_many(
+        [_slot_key(seq) for seq in range(start + 1, end + 1)]
+        + [_dirty_key(rating_id) for rating_id in rating_ids]
+    )
+
+    deltas = {}
+    for rating_id in rating_ids:
+        delta = _take_rating(cache, rating_id)
+        if delta:
+            deltas[rating_id] = delta
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    把 {rating_id: {'likes': n, 'dislikes': n}} 批量写回 api_rating。
+
+    锁定涉及的评分行后在 Python 中计算新值，用一条 CASE 语句更新全部行，
+    并对有效性发生变化的评分同步 TeacherScore。返回更新的评分数。
+    """
+    if not deltas:
+        return 0
+    with transaction.atomic():
+        ratings = list(
+            Rating.objects.select_for_update()
+            .filter(pk__in=list(deltas))
+            .only('rating_id', 'teacher_id', 'school_id', 'tier', 'created_at', 'likes', 'dislikes')
+        )
+        if not ratings:
+            return 0
+
+        previous = {}
+        for rating in ratings:
+            previous[rating.pk] = scores.is_valid(rating.likes, rating.dislikes)
+            rating.likes = max(rating.likes + deltas[rating.pk]['likes'], 0)
+            rating.dislikes = max(rating.dislikes + deltas[rating.pk]['dislikes'], 0)
+
+        Rating.objects.filter(pk__in=[rating.pk for rating in ratings]).update(**{
+            field: Case(
+                *[When(pk=rating.pk, then=Value(getattr(rating, field))) for rating in ratings],
+                output_field=IntegerField(),
+            )
+            for field in COUNTER_FIELDS
+        })
+
+        for rating in ratings:
+            if scores.apply_validity_change(rating, previous[rating.pk]):
+                keywords.schedule_refresh(rating.teacher_id)
+        # 写回后计数和排行榜统计才落库：提交后每个相关学校递增一次数据版本，使读接口的 ETag 失效
+        for school_id in {rating.school_id for rating in ratings}:
+            transaction.on_commit(partial(versions.bump, school_id))
+    return len(ratings)
+
+
+def flush():
+    """写回所有待处理的增量，返回更新的评分数；另一个 flush 正在进行时直接返回 0"""
+    cache = _cache()
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return 0
+    try:
+        deltas = _collect(cache)
+        try:
+            return apply_deltas(deltas)
+        except Exception:
+            # 写回失败时把增量放回缓冲，避免丢失点赞数
+            for rating_id, delta in deltas.items():
+                add(rating_id, **delta)
+            raise
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def flush_rating(rating_id):
+    """
+    立即写回一条评分未写回的增量（修改评分前调用，使有效性和汇总表按最新计数计算）。
+
+    应在调用方的事务之外调用，写回不随调用方的事务回滚。返回是否有增量写回。
+    """
+    if not enabled():
+        return False
+    delta = _take_rating(_cache(), rating_id)
+    if delta is None:
+        return False
+    try:
+        apply_deltas({rating_id: delta})
+    except Exception:
+        add(rating_id, **delta)
+        raise
+    return True
+
+
+def discard(rating_id):
+    """评分删除后丢弃其未写回的增量（事务提交后调用）"""
+    if enabled():
+        _take_rating(_cache(), rating_id)
+
+
+def flush_on_exit():
+    """工作进程退出时写回剩余增量（gunicorn worker_exit 钩子和 atexit 都会调用，重复调用无副作用）"""
+    if not enabled():
+        return
+    try:
+        flush()
+    except Exception:
+        logger.exception('退出时写回点赞缓冲失败')
+    finally:
+        close_old_connections()
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception('写回点赞缓冲失败')
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """首次缓冲点赞时启动后台写回线程（VOTE_BUFFER_FLUSH_INTERVAL_MS 为 0 时只依赖管理命令）"""
+    global _flusher
+    interval_ms = getattr(settings, 'VOTE_BUFFER_FLUSH_INTERVAL_MS', 200)
+    if _flusher is not None or interval_ms <= 0:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop, args=(interval_ms / 1000,),
+                name='vote-buffer-flusher', daemon=True,
+            )
+            _flusher.start()
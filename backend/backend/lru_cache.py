@@ -0,0 +1,118 @@
+"""
+按内存上限淘汰的进程内缓存后端（BACKEND = 'backend.lru_cache.LRUMemoryCache'）。
+
+与 Django 自带的 LocMemCache 相同，值以 pickle 保存在进程内、同一 LOCATION 的实例共享存储；
+区别在于除条目数（OPTIONS['MAX_ENTRIES']）外还限制总字节数（OPTIONS['MAX_BYTES']，按 pickle 后的长度计算），
+超出任一上限时淘汰最久未使用的条目。适合缓存大小差异很大的渲染结果（如列表接口的 JSON）。
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class _Store:
+    def __init__(self):
+        # key -> (过期时间戳或 None, pickle 后的值)，按最近使用排序（末尾最新）
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LRUMemoryCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        self._max_bytes = int(params.get('OPTIONS', {}).get('MAX_BYTES', 64 * 1024 * 1024))
+        with _stores_lock:
+            self._store = _stores.setdefault(name, _Store())
+
+    def _make_key(self, key, version):
+        # 等同于 Django 4.0+ 的 make_and_validate_key，Django 3.2 没有该方法
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _remove(self, key):
+        _, data = self._store.entries.pop(key)
+        self._store.size -= len(data)
+
+    def _live_entry(self, key):
+        """返回未过期的条目并标记为最近使用；已过期的条目直接删除。调用方持有锁"""
+        entry = self._store.entries.get(key)
+        if entry is None:
+            return None
+        expires, _ = entry
+        if expires is not None and expires <= time.time():
+            self._remove(key)
+            return None
+        self._store.entries.move_to_end(key)
+        return entry
+
+    def _set(self, key, data, timeout):
+        store = self._store
+        if key in store.entries:
+            self._remove(key)
+        if len(data) > self._max_bytes:
+            return
+        store.entries[key] = (self.get_backend_timeout(timeout), data)
+        store.size += len(data)
+        while store.size > self._max_bytes or len(store.entries) > self._max_entries:
+            self._remove(next(iter(store.entries)))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._make_key(key, version)
+        data = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            if self._live_entry(key) is not None:
+                return False
+            self._set(key, data, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self._make_key(key, version)
+        with self._store.lock:
+            entry = self._live_entry(key)
+        if entry is None:
+            return default
+        return pickle.loads(entry[1])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._make_key(key, version)
+        data = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            self._set(key, data, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._make_key(key, version)
+        with self._store.lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return False
+            self._store.entries[key] = (self.get_backend_timeout(timeout), entry[1])
+            return True
+
+    def delete(self, key, version=None):
+        key = self._make_key(key, version)
+        with self._store.lock:
+            if key not in self._store.entries:
+                return False
+            self._remove(key)
+            return True
+
+    def has_key(self, key, version=None):
+        key = self._make_key(key, version)
+        with self._store.lock:
+            return self._live_entry(key) is not None
+
+    def clear(self):
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.size = 0
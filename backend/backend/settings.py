@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 
+import django
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -53,13 +54,53 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# ========== SQLite 性能参数 ==========
+#
+# 未配置 DATABASE_URL 时使用 SQLite。SQLITE_TUNING=false 时使用 Django 默认参数（回滚日志模式），
+# 否则每个连接会执行以下 PRAGMA（backend/sqlite3/base.py）：
+# - journal_mode=WAL：读写互不阻塞，写操作只追加 WAL 文件
+# - synchronous=NORMAL：WAL 模式下仍保证数据库一致，只在断电时可能丢失最近提交的事务
+# - busy_timeout：遇到写锁时最多等待的毫秒数，而不是立即报 "database is locked"
+# - mmap_size / cache_size：内存映射读取的大小（字节）和页缓存大小（负数表示 KiB）
+# - temp_store=MEMORY：排序、临时表放在内存中
+# 写事务使用 BEGIN IMMEDIATE 开始；连接在请求间复用 SQLITE_CONN_MAX_AGE 秒。
+# 调整前后的读写吞吐量可用 `python manage.py benchmark_sqlite` 对比。
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024))),
+    'temp_store': 'MEMORY',
 }
 
+if SQLITE_TUNING:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'backend.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.getenv('SQLITE_CONN_MAX_AGE', '600')),
+            'OPTIONS': {
+                # sqlite3 模块自身的等待时间（秒），与 busy_timeout 保持一致
+                'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+                'pragmas': SQLITE_PRAGMAS,
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+    # 复用连接前先检查是否可用（Django 4.1+）。更早的版本没有该选项：本地 SQLite 文件的连接
+    # 不会被服务端断开，复用连接仍然安全，只是少了这层检查
+    if django.VERSION >= (4, 1):
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
 # 如果提供了 DATABASE_URL（例如 Render 上的 Postgres），优先使用它
 db_url = os.getenv('DATABASE_URL')
 if db_url:
@@ -69,6 +110,28 @@ if db_url:
         ssl_require=True,
     )
 
+# ========== 只读副本 ==========
+# DATABASE_REPLICA_URLS：逗号分隔的副本连接串（格式同 DATABASE_URL），配置后启用 api.db_router.ReplicaRouter：
+# 评分、老师、学校和超级管理员列表的 GET 请求读副本，写操作始终走主库；
+# 用户写入后 REPLICA_STICKY_SECONDS 秒内的读请求仍走主库（读己之写）。
+# 本地可用两个 SQLite 文件测试，例如 DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3
+REPLICA_DATABASES = []
+for index, replica_url in enumerate(
+    url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url,
+        conn_max_age=600,
+        ssl_require=not replica_url.startswith('sqlite'),
+    )
+    # 测试时副本指向测试主库
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter'] if REPLICA_DATABASES else []
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
 # ========== 密码验证器配置 ==========
 # 
 # 功能说明：
@@ -116,39 +179,94 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'api.User'
 
+# authenticate() 使用的认证后端：用户名或邮箱均可登录，一条查询找到用户（api/backends.py）
+AUTHENTICATION_BACKENDS = ['api.backends.UsernameOrEmailBackend']
+
+# ========== 密码哈希配置 ==========
+#
+# 首选哈希器 PASSWORD_HASHER：pbkdf2（默认）、scrypt（Django 4.0+）或 argon2（需安装 argon2-cffi）。
+# 修改首选哈希器或下面的参数后，旧的密码哈希仍可校验，用户下次登录成功时自动按新设置重新哈希。
+# 参数可用 `python manage.py benchmark_password_hashers --target-ms 100` 按目标耗时测算。
+# 各参数为 0 时使用 Django 的默认值
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '0'))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', '0'))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '0'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', '0'))
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'api.hashers.PBKDF2PasswordHasher',
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+}
+if django.VERSION >= (4, 0):
+    _PASSWORD_HASHERS['scrypt'] = 'api.hashers.ScryptPasswordHasher'
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# 登录密码校验进程池（api/passwords.py）：子进程数（0 表示在请求线程内计算）、
+# 最多同时排队的校验数（超出时登录接口返回 429）、单次校验最长等待秒数。
+# 每个 Web 工作进程各有一个进程池，默认子进程数按整机 CPU 核数的一半除以工作进程数（WEB_CONCURRENCY，
+# gunicorn.conf.py 启动时会设置）计算，至少 1 个，避免整机的哈希子进程数随工作进程数成倍增加
+_WEB_WORKERS = max(int(os.getenv('WEB_CONCURRENCY', '1')), 1)
+PASSWORD_HASH_WORKERS = int(os.getenv(
+    'PASSWORD_HASH_WORKERS', str(max((os.cpu_count() or 2) // 2 // _WEB_WORKERS, 1))
+))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
 # ========== Django REST Framework 配置 ==========
+
+# 身份验证类列表（按优先级顺序）
+# 当请求到达时，DRF 会依次尝试这些认证方式，直到找到有效的认证。
+# 可通过环境变量 API_AUTHENTICATION_CLASSES（逗号分隔的类路径）按部署调整顺序或去掉不需要的方式，
+# 例如纯 API 部署只保留 api.authentication.CachedTokenAuthentication。
+DEFAULT_AUTHENTICATION_CLASSES = [
+    # 1. CachedTokenAuthentication - 基于Token的认证（本项目主要使用），放在最前面，
+    #    携带 Token 的请求不必先经过 Session / Basic 认证
+    #    工作原理：
+    #    - 客户端在请求头中携带：Authorization: Token <token_string>
+    #    - DRF从请求头中提取Token
+    #    - 先查进程内 LRU 缓存（api/authentication.py），命中则直接得到用户，不查数据库
+    #    - 未命中时在 api_authtoken 表中查找对应的Token（连同用户一次查出）并写入缓存
+    #    - Token 有过期时间（AUTH_TOKEN_LIFETIME），缓存命中时同样按过期时间校验
+    #    - 如果未找到，返回401 Unauthorized
+    #
+    #    安全特性：
+    #    - Token是40字符的随机字符串，具有高熵值
+    #    - Token存储在服务器端数据库，客户端无法篡改
+    #    - 修改密码、禁用/删除用户等操作会主动失效缓存；缓存有效期见 AUTH_TOKEN_CACHE_TTL
+    #    - 建议使用HTTPS传输，防止Token被截获
+    'api.authentication.CachedTokenAuthentication',
+
+    # 2. SessionAuthentication - 基于会话的认证（用于Django admin等）
+    #    使用Django的session框架，适合同域部署
+    'rest_framework.authentication.SessionAuthentication',
+
+    # 3. BasicAuthentication - HTTP基本认证
+    #    使用用户名和密码的Base64编码，安全性较低，主要用于测试
+    'rest_framework.authentication.BasicAuthentication',
+]
+if os.getenv('API_AUTHENTICATION_CLASSES'):
+    DEFAULT_AUTHENTICATION_CLASSES = [
+        path.strip() for path in os.getenv('API_AUTHENTICATION_CLASSES').split(',') if path.strip()
+    ]
+
+# Token 认证缓存（api/authentication.py）：最多缓存的 Token 数（0 关闭缓存）、每条缓存的有效期（秒）。
+# 配置了 SHARED_CACHE_URL 时各工作进程共享，改密码、禁用用户等操作立即对所有进程生效；
+# 否则为进程内缓存，其他进程最多 AUTH_TOKEN_CACHE_TTL 秒后失效
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))
+
+# 登录 Token：有效期（秒，默认 7 天，使用中自动续期）、每个用户最多保留的设备 Token 数
+AUTH_TOKEN_LIFETIME = int(os.getenv('AUTH_TOKEN_LIFETIME', str(7 * 24 * 3600)))
+AUTH_TOKEN_MAX_PER_USER = int(os.getenv('AUTH_TOKEN_MAX_PER_USER', '10'))
+
 REST_FRAMEWORK = {
-    # 身份验证类列表（按优先级顺序）
-    # 当请求到达时，DRF 会依次尝试这些认证方式，直到找到有效的认证
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        # 1. SessionAuthentication - 基于会话的认证（用于Django admin等）
-        #    使用Django的session框架，适合同域部署
-        'rest_framework.authentication.SessionAuthentication',
-        
-        # 2. BasicAuthentication - HTTP基本认证
-        #    使用用户名和密码的Base64编码，安全性较低，主要用于测试
-        'rest_framework.authentication.BasicAuthentication',
-        
-        # 3. TokenAuthentication - 基于Token的认证（本项目主要使用）
-        #    工作原理：
-        #    - 客户端在请求头中携带：Authorization: Token <token_string>
-        #    - DRF从请求头中提取Token
-        #    - 在authtoken_token表中查找对应的Token
-        #    - 如果找到，设置request.user为Token关联的用户
-        #    - 如果未找到，返回401 Unauthorized
-        #
-        #    Token查找流程：
-        #    1. 提取Authorization头中的Token值
-        #    2. 执行SQL查询：SELECT * FROM authtoken_token WHERE key = '<token>'
-        #    3. 如果找到，通过外键获取关联的User对象
-        #    4. 设置request.user = token.user
-        #
-        #    安全特性：
-        #    - Token是40字符的随机字符串，具有高熵值
-        #    - Token存储在服务器端数据库，客户端无法篡改
-        #    - 建议使用HTTPS传输，防止Token被截获
-        'rest_framework.authentication.TokenAuthentication',
-    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': DEFAULT_AUTHENTICATION_CLASSES,
     
     # 默认权限类
     # 如果视图没有指定permission_classes，将使用此默认权限
@@ -157,10 +275,126 @@ REST_FRAMEWORK = {
         # 未认证的请求将返回401 Unauthorized
         'rest_framework.permissions.IsAuthenticated',
     ],
+
+    # 默认分页：基于主键的游标分页（api.pagination.PrimaryKeyCursorPagination）
+    # 按需启用：请求携带 ?page_size= 或 ?cursor= 时才分页，否则仍返回完整列表（兼容旧前端）
+    # 单页上限为 200 条；评分列表使用 (created_at, rating_id) 作为游标
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PrimaryKeyCursorPagination',
+    'PAGE_SIZE': 50,
+
+    # 登录/注册限流速率（api/throttling.py，滑动窗口），格式为 次数/时间单位（s、min、hour、day）
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '30/min'),
+        'login_identifier': os.getenv('THROTTLE_LOGIN_IDENTIFIER', '10/min'),
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', '10/hour'),
+    },
+    # 前面的反向代理层数，用于从 X-Forwarded-For 中取出真实客户端 IP。默认 0：忽略客户端可伪造的
+    # X-Forwarded-For，直接使用连接地址；部署在 nginx 之后时设置 API_NUM_PROXIES=1
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', '0')),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# 超级管理员统计面板缓存时间（秒），可通过环境变量覆盖；写操作会同步更新或失效缓存
+SUPERADMIN_STATS_CACHE_TTL = int(os.getenv('SUPERADMIN_STATS_CACHE_TTL', '30'))
+
+# ========== 缓存配置 ==========
+# 多进程共享缓存（Redis），如 redis://127.0.0.1:6379/1，需要 pip install redis（Django 3.2 为 django-redis）。
+# gunicorn 多个工作进程之间需要一致的状态（点赞写后缓冲、登录限流）放在这里；未配置时退回本机缓存
+SHARED_CACHE_URL = os.getenv('SHARED_CACHE_URL', '')
+
+
+def shared_cache(key_prefix, local_location, max_entries):
+    """配置了 SHARED_CACHE_URL 时使用 Redis，否则使用进程内缓存（仅适合单进程）"""
+    if SHARED_CACHE_URL:
+        return {
+            # Django 4.0 起内置 Redis 后端；Django 3.2 需要 pip install django-redis
+            'BACKEND': (
+                'django.core.cache.backends.redis.RedisCache' if django.VERSION >= (4, 0)
+                else 'django_redis.cache.RedisCache'
+            ),
+            'LOCATION': SHARED_CACHE_URL,
+            'KEY_PREFIX': key_prefix,
+        }
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': local_location,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    # 默认缓存：进程内 LocMemCache（统计面板等）
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # 点赞写后缓冲（api/vote_buffer.py）：条目不设过期，调大上限避免未写回的增量被淘汰。
+    # 开启缓冲时必须是共享缓存（见 SHARED_CACHE_URL），否则启动时报错
+    'votes': shared_cache('votes', 'vote-buffer', 100000),
+    # Token 认证缓存（api/authentication.py）
+    'tokens': shared_cache('tokens', 'auth-tokens', max(AUTH_TOKEN_CACHE_SIZE, 1)),
+}
+
+# 登录/注册限流的请求时间戳（api/throttling.py）：计数必须在所有工作进程间共享，否则实际限额会乘以进程数。
+# 配置了 SHARED_CACHE_URL 时使用 Redis，否则使用 THROTTLE_CACHE_DIR 下的文件缓存（同一台机器的进程共享）
+if SHARED_CACHE_URL:
+    CACHES['throttle'] = shared_cache('throttle', 'throttle', 50000)
+else:
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('THROTTLE_CACHE_DIR', str(BASE_DIR / 'throttle_cache')),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+
+# 列表接口响应缓存（api/response_cache.py），RESPONSE_CACHE_BACKEND 选择存储方式：
+# - memory（默认）：进程内 LRU 缓存，按条目数和总字节数（RESPONSE_CACHE_MAX_MB）淘汰，适合单进程/单机
+# - file：缓存文件写入 RESPONSE_CACHE_DIR，gunicorn 多个工作进程共享
+# - off：不缓存
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '600'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '2000'))
+if RESPONSE_CACHE_BACKEND == 'file':
+    CACHES['responses'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('RESPONSE_CACHE_DIR', str(BASE_DIR / 'response_cache')),
+        'TIMEOUT': RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES},
+    }
+elif RESPONSE_CACHE_BACKEND == 'off':
+    CACHES['responses'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+else:
+    CACHES['responses'] = {
+        'BACKEND': 'backend.lru_cache.LRUMemoryCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES,
+            'MAX_BYTES': int(os.getenv('RESPONSE_CACHE_MAX_MB', '64')) * 1024 * 1024,
+        },
+    }
+RESPONSE_CACHE = 'responses'
+
+# 点赞/点踩写后缓冲：开启后计数增量先进入缓冲，由后台线程每隔 N 毫秒批量写回数据库
+# 设为 0 则不启动后台线程，仅通过 `python manage.py flush_vote_buffers` 写回。
+# 缓冲必须放在各进程共享的缓存中（需设置 SHARED_CACHE_URL），工作进程退出前会写回缓冲
+VOTE_BUFFER_ENABLED = os.getenv('VOTE_BUFFER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+VOTE_BUFFER_FLUSH_INTERVAL_MS = int(os.getenv('VOTE_BUFFER_FLUSH_INTERVAL_MS', '200'))
+VOTE_BUFFER_CACHE = 'votes'
+
+# 老师关键词重算（api/keywords.py）：评分写入后只标记待重算，后台线程每隔 N 毫秒合并重算一批（每批最多 BATCH 位老师）。
+# 设为 0 则不启动后台线程，仅通过 `python manage.py refresh_keywords` 重算
+KEYWORDS_REFRESH_INTERVAL_MS = int(os.getenv('KEYWORDS_REFRESH_INTERVAL_MS', '2000'))
+KEYWORDS_REFRESH_BATCH = int(os.getenv('KEYWORDS_REFRESH_BATCH', '100'))
+
+# 评分、老师列表使用 .values() 快速序列化（api/fast_serializers.py），输出与 ModelSerializer 相同；设为 false 回退
+FAST_LIST_SERIALIZERS = os.getenv('FAST_LIST_SERIALIZERS', 'true').lower() in ('1', 'true', 'yes')
+
+# 登录/注册限流使用的缓存别名（api/throttling.py）
+THROTTLE_CACHE = 'throttle'
+
+# Token 认证缓存使用的缓存别名（api/authentication.py）
+AUTH_TOKEN_CACHE = 'tokens'
+
 # 日志配置 - 不记录敏感信息（用户名、邮箱等）
 LOGGING = {
     'version': 1,
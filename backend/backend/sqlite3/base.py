@@ -0,0 +1,40 @@
+"""
+带性能参数的 SQLite 数据库后端（ENGINE = 'backend.sqlite3'）。
+
+在 Django 自带的 sqlite3 后端基础上：
+- 每个新连接执行 OPTIONS['pragmas'] 中的 PRAGMA（WAL、synchronous、busy_timeout、mmap_size 等，
+  配置见 settings.py 的 SQLITE_PRAGMAS），WAL 模式下读写互不阻塞
+- OPTIONS['transaction_mode'] 为 IMMEDIATE 时，atomic() 以 BEGIN IMMEDIATE 开始事务：
+  写事务在开始时就取得写锁、按 busy_timeout 排队，而不是在事务中途由读升级为写时
+  直接报 "database is locked"
+"""
+from django.db.backends.sqlite3 import base
+
+
+def apply_pragmas(conn, pragmas):
+    """在连接上依次执行 PRAGMA name = value"""
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get('transaction_mode')
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -2,7 +2,7 @@ from django.contrib import admin
 import os
 from django.http import JsonResponse, HttpResponseRedirect
 from django.urls import path, include
-from rest_framework.authtoken.views import obtain_auth_token
+from api.views import ObtainExpiringAuthToken
 
 
 def healthz(_request):
@@ -25,7 +25,7 @@ def root(_request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),  # /admin 显示 Django 后台
-    path('api/token-auth/', obtain_auth_token),
+    path('api/token-auth/', ObtainExpiringAuthToken.as_view()),
     path('api/', include('api.urls')),
     path('healthz', healthz),  # Render 健康检查使用
     path('', root),  # 根路径重定向到前端（放在最后，避免覆盖其他路径）
@@ -0,0 +1,55 @@
+"""
+gunicorn 生产环境配置（python manage.py serve 或 gunicorn -c gunicorn.conf.py backend.wsgi 使用）
+
+所有参数都可以通过环境变量调整：
+- HOST / PORT：监听地址和端口（默认 0.0.0.0:8000）
+- WEB_CONCURRENCY：工作进程数（默认 CPU 核数 × 2 + 1）
+- GUNICORN_THREADS：每个工作进程的线程数（默认 4，大于 1 时使用 gthread 工作模式以支持 keep-alive）
+- GUNICORN_TIMEOUT：单个请求最长处理时间（秒），超时的工作进程会被重启（默认 30）
+- GUNICORN_GRACEFUL_TIMEOUT：重载/停止时等待正在处理的请求完成的时间（秒，默认 30）
+- GUNICORN_KEEPALIVE：keep-alive 连接的空闲等待时间（秒，默认 5）
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER：工作进程处理多少请求后自动重启，
+  防止内存缓慢增长（默认 2000 / 200，设为 0 关闭）
+- GUNICORN_BACKLOG：等待 accept 的连接队列长度（默认 2048）
+- GUNICORN_LOG_LEVEL：日志级别（默认 info）
+
+平滑重载：向主进程发送 HUP 信号（kill -HUP <pid>），会按新代码启动新工作进程，
+旧工作进程处理完当前请求后退出；TERM 信号为平滑停止。
+数据库等应用配置仍然通过 DATABASE_URL 等环境变量设置（见 backend/settings.py）。
+"""
+import multiprocessing
+import os
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# 应用在每个工作进程中各自加载：进程内缓存（如 Token 缓存）和后台线程不跨进程共享
+preload_app = False
+
+
+def on_starting(server):
+    """把最终的工作进程数（含 serve --workers 覆盖的值）告诉工作进程，用于按整机计算密码哈希进程池大小"""
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+
+
+def worker_exit(server, worker):
+    """工作进程退出（被回收、重载或停止）时写回点赞缓冲中剩余的增量"""
+    import sys
+    # 只有已加载过点赞缓冲的进程才需要写回；应用未加载完成时不能导入 Django 模块
+    if 'api.vote_buffer' in sys.modules:
+        sys.modules['api.vote_buffer'].flush_on_exit()
@@ -196,6 +196,29 @@ async function request(path, options = {}) {
   return fetchPromise;
 }
 
+/**
+ * 游标分页参数
+ *
+ * 列表接口默认返回完整数组；传入 pageSize 或 cursor 时启用游标分页（"加载更多"模式），
+ * 返回 { next, results }，next 为下一页完整 URL（没有更多数据时为 null）。
+ * 调用方用 nextCursor(page.next) 取出游标传给下一次请求。
+ */
+function pageQuery({ cursor, pageSize, ...extra } = {}) {
+  const params = new URLSearchParams()
+  Object.entries(extra).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') params.set(key, value)
+  })
+  if (pageSize) params.set('page_size', pageSize)
+  if (cursor) params.set('cursor', cursor)
+  const query = params.toString()
+  return query ? `?${query}` : ''
+}
+
+export function nextCursor(nextUrl) {
+  if (!nextUrl) return null
+  return new URL(nextUrl).searchParams.get('cursor')
+}
+
 export const api = {
   loginUser: (identifier, password) =>
     request('/login-user/', {
@@ -268,7 +291,22 @@ export const api = {
   me: () => request('/users/me/'),
   getQuota: () => request('/user-votes/quota/'),
   getTeachers: () => request('/teachers/'),
-  getRatings: () => request('/ratings/'),
+  // 老师详情页：{ teacher, stats: { T1, T2, T3, count, total_score, rank, school_teacher_count }, ratings: { next, results } }
+  getTeacherDetail: (id, { pageSize } = {}) => request(`/teachers/${id}/detail/${pageQuery({ pageSize })}`),
+  // 老师评分后续页（神评置顶、时间倒序），cursor 取自上一页的 next
+  getTeacherRatings: (id, page) => request(`/teachers/${id}/ratings/${pageQuery(page)}`),
+  // 老师评论关键词（服务端计算），返回 { teacher_id, keywords: [...] }
+  getTeacherKeywords: (id) => request(`/teachers/${id}/keywords/`),
+  // 服务端排行榜：range = today|month|semester|year|all，返回分页结果 { count, next, previous, results }
+  getLeaderboard: ({ range = 'all', school = '', search = '', page = 1, pageSize = 50 } = {}) => {
+    const params = new URLSearchParams({ range, page, page_size: pageSize })
+    if (school) params.set('school', school)
+    if (search) params.set('search', search)
+    return request(`/teachers/leaderboard/?${params.toString()}`)
+  },
+  // getRatings() 返回全部评分；getRatings({ pageSize, cursor }) 按页加载
+  // 按时间过滤：getRatings({ range: 'semester' }) 或 getRatings({ since: '2024-09-01', until: '2024-12-31' })
+  getRatings: (page) => request(`/ratings/${pageQuery(page)}`),
   getMyRatings: () => request('/ratings/mine/'),
   getTeachersRaw: () => request('/teachers/'),
   createTeacher: (payload) =>
@@ -389,8 +427,11 @@ export const api = {
       method: 'POST',
       body: JSON.stringify({ username, password }),
     }),
-  getSuperAdminStats: () => request('/superadmin/stats/'),
-  getAllRatings: () => request('/superadmin/all_ratings/'),
+  // 统计数据在服务端有短时缓存，fresh=true 时强制重新计算
+  getSuperAdminStats: (fresh = false) => request(`/superadmin/stats/${fresh ? '?fresh=1' : ''}`),
+  // 传入 { voters: 0 } 时列表不带点赞/点踩用户，详情再调用 getRatingVoters
+  getAllRatings: (page) => request(`/superadmin/all_ratings/${pageQuery(page)}`),
+  getRatingVoters: (id) => request(`/superadmin/${id}/voters/`),
   getAllUsers: () => request('/superadmin/all_users/'),
   getAllSchools: () => request('/superadmin/all_schools/'),
   createSchool: (payload) =>
@@ -73,7 +73,10 @@ if command -v lsof > /dev/null 2>&1; then
     fi
 fi
 
-nohup "$VENV_PATH/bin/python" manage.py runserver 0.0.0.0:$BACKEND_PORT > ../backend.log 2>&1 &
+# 生产模式：manage.py serve 启动 gunicorn 主进程和多个工作进程（数量默认按 CPU 核数计算），
+# 工作进程数、超时等可通过 WEB_CONCURRENCY、GUNICORN_* 环境变量调整（见 backend/gunicorn.conf.py）
+# 平滑重载代码：kill -HUP $(cat backend.pid)
+nohup "$VENV_PATH/bin/python" manage.py serve 0.0.0.0:$BACKEND_PORT > ../backend.log 2>&1 &
 BACKEND_PID=$!
 echo "后端已启动 (PID: $BACKEND_PID, 端口: $BACKEND_PORT)"
 echo "后端日志: backend.log"